@@ -0,0 +1,83 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+LOG_FILE = os.path.join("data", "app.log")
+# app.log is rotated at LOG_MAX_BYTES; LOG_BACKUP_COUNT gzipped segments (app.log.1.gz, ...) are kept.
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+# Set to "json" to write one JSON object per line instead of plain text.
+LOG_FORMAT_ENV = "WCTB_LOG_FORMAT"
+LOG_TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as one compact JSON object: time, level, thread, message and any traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {'time': self.formatTime(record), 'level': record.levelname, 'thread': record.threadName,
+                 'message': record.getMessage()}
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'), ensure_ascii=False)
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _file_handler(path: str, json_lines: bool) -> RotatingFileHandler:
+    handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    handler.namer = lambda name: name + ".gz"
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(LOG_TEXT_FORMAT))
+    return handler
+
+
+def setup_logging(path: str = LOG_FILE, level: int = logging.INFO, json_lines: Optional[bool] = None,
+                  extra_handlers=()) -> QueueListener:
+    """Routes the root logger through a queue to a rotating, gzip-compressing file handler.
+
+    Callers only pay for putting the record on a queue; formatting, file I/O,
+    rotation and compression happen on the listener's thread. ``json_lines``
+    defaults to the LOG_FORMAT_ENV setting. ``extra_handlers`` (e.g. a console
+    handler for the CLI) are fed from the same queue. The listener is stopped,
+    and the queue drained, at interpreter exit or by ``shutdown_logging``.
+    """
+    global _listener
+    if _listener:
+        return _listener
+    if json_lines is None:
+        json_lines = os.environ.get(LOG_FORMAT_ENV, "").lower() == "json"
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, _file_handler(path, json_lines), *extra_handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Writes out every queued record and stops the listener thread."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
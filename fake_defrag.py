@@ -0,0 +1,46 @@
+"""Stand-in for defrag.exe, for running the defrag tools off Windows.
+
+Point WCTB_DEFRAG_COMMAND at it, e.g. ``python fake_defrag.py``. It prints
+/U-style progress for an analysis and a defragmentation pass, then exits.
+
+    FAKE_DEFRAG_FAIL    comma-separated drives that exit with code 3
+    FAKE_DEFRAG_STEP    seconds between progress updates (default 0.05)
+    FAKE_DEFRAG_HOLD    if set, ignore SIGTERM, start a grandchild that keeps
+                        stdout open, and never finish
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+
+
+def hold():
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    while True:
+        time.sleep(1)
+
+
+def main():
+    if sys.argv[1] == "--hold":
+        hold()
+    drive = sys.argv[1]
+    step = float(os.environ.get("FAKE_DEFRAG_STEP", "0.05"))
+    print(f"Invoking defragmentation on ({drive})...", flush=True)
+    if os.environ.get("FAKE_DEFRAG_HOLD"):
+        # Inherits stdout, so the pipe stays open even if this process goes away.
+        subprocess.Popen([sys.executable, __file__, "--hold"])
+        print("\tAnalysis:  0% complete...", flush=True)
+        hold()
+    for stage in ("Analysis", "Defragmentation"):
+        for percent in range(0, 101, 25):
+            sys.stdout.write(f"\r\t{stage}:  {percent}% complete...")
+            sys.stdout.flush()
+            time.sleep(step)
+        print()
+    failing = [d for d in os.environ.get("FAKE_DEFRAG_FAIL", "").split(",") if d]
+    sys.exit(3 if drive in failing else 0)
+
+
+if __name__ == "__main__":
+    main()
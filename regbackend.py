@@ -0,0 +1,373 @@
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import winreg
+except ImportError:  # Not on Windows: only the emulator is available.
+    winreg = None
+
+# Same numeric values as the winreg module, so data is interchangeable between backends.
+HKEY_CURRENT_USER = 0x80000001
+HKEY_LOCAL_MACHINE = 0x80000002
+KEY_QUERY_VALUE = 0x0001
+KEY_SET_VALUE = 0x0002
+KEY_READ = 0x20019
+KEY_WRITE = 0x20006
+KEY_ALL_ACCESS = 0xF003F
+REG_NONE = 0
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_MULTI_SZ = 7
+REG_QWORD = 11
+
+# Environment variable naming a JSON file to load into the emulator instead of using winreg; changes are
+# saved back to it.
+REGISTRY_FILE_ENV = "WCTB_REGISTRY_FILE"
+
+_HIVE_NAMES = {HKEY_CURRENT_USER: "HKEY_CURRENT_USER", HKEY_LOCAL_MACHINE: "HKEY_LOCAL_MACHINE"}
+_HIVES_BY_NAME = {name: hkey for hkey, name in _HIVE_NAMES.items()}
+
+
+class RegistryBackend(ABC):
+    """Interface used by WinTweaks for all registry access.
+
+    Methods mirror the winreg functions of the same name, including their
+    arguments, return values and the OSError subclasses they raise, so code
+    written against winreg only needs ``winreg.`` replaced by the backend.
+    A backend missing any of them cannot be instantiated.
+    """
+
+    @abstractmethod
+    def OpenKey(self, hkey, sub_key: str, reserved: int = 0, access: int = KEY_READ):
+        ...
+
+    @abstractmethod
+    def CreateKey(self, hkey, sub_key: str):
+        ...
+
+    def CloseKey(self, key):
+        key.Close()
+
+    @abstractmethod
+    def QueryValueEx(self, key, name: str) -> Tuple[Any, int]:
+        ...
+
+    @abstractmethod
+    def SetValueEx(self, key, name: str, reserved: int, value_type: int, value: Any):
+        ...
+
+    @abstractmethod
+    def DeleteValue(self, key, name: str):
+        ...
+
+    @abstractmethod
+    def EnumValue(self, key, index: int) -> Tuple[str, Any, int]:
+        ...
+
+    @abstractmethod
+    def EnumKey(self, key, index: int) -> str:
+        ...
+
+    @abstractmethod
+    def QueryInfoKey(self, key) -> Tuple[int, int, int]:
+        """Returns ``(subkey_count, value_count, last_write_time)``."""
+
+    @abstractmethod
+    def broadcast_setting_change(self):
+        """Notifies running applications that settings changed."""
+
+    def flush(self):
+        """Makes the writes so far durable. winreg writes already are."""
+
+
+class WinregBackend(RegistryBackend):
+    """The real Windows registry, through the winreg module."""
+
+    def OpenKey(self, hkey, sub_key, reserved=0, access=KEY_READ):
+        return winreg.OpenKey(hkey, sub_key, reserved, access)
+
+    def CreateKey(self, hkey, sub_key):
+        return winreg.CreateKey(hkey, sub_key)
+
+    def CloseKey(self, key):
+        winreg.CloseKey(key)
+
+    def QueryValueEx(self, key, name):
+        return winreg.QueryValueEx(key, name)
+
+    def SetValueEx(self, key, name, reserved, value_type, value):
+        winreg.SetValueEx(key, name, reserved, value_type, value)
+
+    def DeleteValue(self, key, name):
+        winreg.DeleteValue(key, name)
+
+    def EnumValue(self, key, index):
+        return winreg.EnumValue(key, index)
+
+    def EnumKey(self, key, index):
+        return winreg.EnumKey(key, index)
+
+    def QueryInfoKey(self, key):
+        return winreg.QueryInfoKey(key)
+
+    def broadcast_setting_change(self):
+        import ctypes  # Deferred: only needed once settings are written.
+        HWND_BROADCAST = 0xFFFF
+        WM_SETTINGCHANGE = 0x001A
+        SMTO_ABORTIFHUNG = 0x0002
+        result = ctypes.c_long()
+        # Using a generic "Environment" string is often effective for Explorer settings.
+        ctypes.windll.user32.SendMessageTimeoutW(HWND_BROADCAST, WM_SETTINGCHANGE, 0, "Environment", SMTO_ABORTIFHUNG, 5000, ctypes.byref(result))
+
+
+class _MemoryKey:
+    """Stored state of one emulated key."""
+
+    def __init__(self):
+        self.subkeys: Dict[str, str] = {}  # lower-case name -> name as created
+        self.values: Dict[str, Tuple[str, Any, int]] = {}  # lower-case name -> (name, value, type)
+        self.last_write = 0
+
+
+class MemoryKeyHandle:
+    """Open handle to an emulated key; usable as a context manager like PyHKEY."""
+
+    def __init__(self, registry: "MemoryRegistry", path: Tuple[int, str], access: int):
+        self.registry = registry
+        self.path = path
+        self.access = access
+        self.closed = False
+
+    def Close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
+
+
+class MemoryRegistry(RegistryBackend):
+    """In-memory registry emulator with winreg semantics.
+
+    Key and value names are case-insensitive but keep the case they were
+    created with, EnumValue returns values in insertion order, DWORD and
+    binary values are type-checked the way winreg checks them, and writes
+    through a handle opened without KEY_SET_VALUE are refused. The contents can
+    be loaded from and saved to a JSON file; ``flush`` saves to ``path`` if
+    set. Broadcasts are only counted.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._keys: Dict[Tuple[int, str], _MemoryKey] = {}
+        self._clock = 0
+        self.broadcast_count = 0
+        for hkey in _HIVE_NAMES:
+            self._keys[(hkey, "")] = _MemoryKey()
+
+    @staticmethod
+    def _norm(sub_key: str) -> str:
+        return "\\".join(part for part in sub_key.split("\\") if part).lower()
+
+    def _touch(self, key: _MemoryKey):
+        self._clock += 1
+        key.last_write = self._clock
+
+    def _get(self, handle: MemoryKeyHandle) -> _MemoryKey:
+        if handle.closed:
+            raise OSError(6, "The handle is invalid")
+        return self._keys[handle.path]
+
+    @staticmethod
+    def _check_write(handle: MemoryKeyHandle):
+        if not handle.access & KEY_SET_VALUE:
+            raise PermissionError(13, "Access is denied")
+
+    @staticmethod
+    def _check_value(value_type: int, value: Any):
+        if value_type == REG_DWORD:
+            if not isinstance(value, int):
+                raise TypeError("Objects of type '%s' can not be used as DWORD registry values" % type(value).__name__)
+            if not 0 <= value <= 0xFFFFFFFF:
+                raise OverflowError("int too big to convert")
+        elif value_type == REG_QWORD:
+            if not isinstance(value, int) or not 0 <= value <= 0xFFFFFFFFFFFFFFFF:
+                raise ValueError("Could not convert the data to the specified type.")
+        elif value_type == REG_BINARY:
+            if value is not None and not isinstance(value, (bytes, bytearray)):
+                raise TypeError("Objects of type '%s' can not be used as binary registry values" % type(value).__name__)
+        elif value_type in (REG_SZ, REG_EXPAND_SZ):
+            if value is not None and not isinstance(value, str):
+                raise ValueError("Could not convert the data to the specified type.")
+        elif value_type == REG_MULTI_SZ:
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ValueError("Could not convert the data to the specified type.")
+
+    def OpenKey(self, hkey, sub_key, reserved=0, access=KEY_READ):
+        path = (hkey, self._norm(sub_key))
+        with self._lock:
+            if path not in self._keys:
+                raise FileNotFoundError(2, "The system cannot find the file specified")
+        return MemoryKeyHandle(self, path, access)
+
+    def CreateKey(self, hkey, sub_key):
+        parts = [part for part in sub_key.split("\\") if part]
+        with self._lock:
+            parent = self._keys[(hkey, "")]
+            for depth, part in enumerate(parts):
+                path = (hkey, "\\".join(parts[:depth + 1]).lower())
+                if path not in self._keys:
+                    self._keys[path] = _MemoryKey()
+                    parent.subkeys[part.lower()] = part
+                    self._touch(parent)
+                parent = self._keys[path]
+        return MemoryKeyHandle(self, (hkey, self._norm(sub_key)), KEY_ALL_ACCESS)
+
+    def QueryValueEx(self, key, name):
+        with self._lock:
+            stored = self._get(key).values.get(name.lower())
+        if stored is None:
+            raise FileNotFoundError(2, "The system cannot find the file specified")
+        return stored[1], stored[2]
+
+    def SetValueEx(self, key, name, reserved, value_type, value):
+        self._check_write(key)
+        self._check_value(value_type, value)
+        if isinstance(value, bytearray):
+            value = bytes(value)
+        with self._lock:
+            record = self._get(key)
+            existing = record.values.get(name.lower())
+            # Overwriting keeps the value's position and original name case, as the registry does.
+            record.values[name.lower()] = (existing[0] if existing else name, value, value_type)
+            self._touch(record)
+
+    def DeleteValue(self, key, name):
+        self._check_write(key)
+        with self._lock:
+            record = self._get(key)
+            if record.values.pop(name.lower(), None) is None:
+                raise FileNotFoundError(2, "The system cannot find the file specified")
+            self._touch(record)
+
+    def EnumValue(self, key, index):
+        with self._lock:
+            values = list(self._get(key).values.values())
+        if not 0 <= index < len(values):
+            raise OSError(22, "No more data is available")
+        return values[index]
+
+    def EnumKey(self, key, index):
+        with self._lock:
+            names = list(self._get(key).subkeys.values())
+        if not 0 <= index < len(names):
+            raise OSError(22, "No more data is available")
+        return names[index]
+
+    def QueryInfoKey(self, key):
+        with self._lock:
+            record = self._get(key)
+            return len(record.subkeys), len(record.values), record.last_write
+
+    def broadcast_setting_change(self):
+        with self._lock:
+            self.broadcast_count += 1
+
+    # --- JSON persistence ---
+
+    @staticmethod
+    def _encode(value: Any, value_type: int) -> Any:
+        if value_type == REG_BINARY and value is not None:
+            return value.hex()
+        return value
+
+    @staticmethod
+    def _decode(value: Any, value_type: int) -> Any:
+        if value_type == REG_BINARY and value is not None:
+            return bytes.fromhex(value)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the registry as ``{"HIVE\\\\path": {"name": [type, value], ...}}``."""
+        data: Dict[str, Any] = {}
+        with self._lock:
+            for path in sorted(self._keys, key=lambda p: (p[0], p[1])):
+                record = self._keys[path]
+                full_name = self._full_name(path)
+                if full_name is None:
+                    continue
+                data[full_name] = {name: [value_type, self._encode(value, value_type)] for name, value, value_type in record.values.values()}
+        return data
+
+    def _full_name(self, path: Tuple[int, str]) -> Optional[str]:
+        """Rebuilds the original-case name of a key, e.g. 'HKEY_CURRENT_USER\\\\Software'."""
+        hkey, sub_key = path
+        if not sub_key:
+            return None
+        parts: List[str] = [_HIVE_NAMES[hkey]]
+        parent = self._keys[(hkey, "")]
+        lowered = sub_key.split("\\")
+        for depth, part in enumerate(lowered):
+            parts.append(parent.subkeys[part])
+            parent = self._keys[(hkey, "\\".join(lowered[:depth + 1]))]
+        return "\\".join(parts)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MemoryRegistry":
+        registry = cls()
+        for full_name, values in data.items():
+            hive_name, _, sub_key = full_name.partition("\\")
+            with registry.CreateKey(_HIVES_BY_NAME[hive_name], sub_key) as key:
+                for name, (value_type, value) in values.items():
+                    registry.SetValueEx(key, name, 0, value_type, cls._decode(value, value_type))
+        return registry
+
+    @classmethod
+    def load(cls, path: str) -> "MemoryRegistry":
+        with open(path, 'r') as f:
+            registry = cls.from_dict(json.load(f))
+        registry.path = path
+        return registry
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        if self.path:
+            self.save(self.path)
+
+
+def default_backend() -> RegistryBackend:
+    """Returns the JSON emulator if WCTB_REGISTRY_FILE is set or winreg is missing, else winreg.
+
+    An emulator loaded from WCTB_REGISTRY_FILE saves back to it on ``flush``.
+    If the file cannot be read the emulator starts empty and is not saved, so
+    the file is left as it is.
+    """
+    registry_file = os.getenv(REGISTRY_FILE_ENV)
+    if registry_file:
+        if not os.path.exists(registry_file):
+            return MemoryRegistry(registry_file)
+        try:
+            return MemoryRegistry.load(registry_file)
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            # Module logger: this runs at import time, before logging is set up, and the root
+            # logger's functions would install a default console handler.
+            logging.getLogger(__name__).error("Could not load registry file %s, starting with an empty registry that is not saved: %s",
+                                              registry_file, e)
+            return MemoryRegistry()
+    if winreg is None:
+        return MemoryRegistry()
+    return WinregBackend()
@@ -0,0 +1,172 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, TypedDict
+
+from regbackend import HKEY_LOCAL_MACHINE
+from wintweaks import WinTweaks, ProgressEvent, PROGRESS_POLL_SECONDS
+
+# Seconds a check may run before it is reported as timed out.
+CHECK_TIMEOUT = 5.0
+# Seconds a check's 'ok' or 'issue' result is reused before the check runs again.
+CHECK_RESULT_TTL = 600
+
+
+class CheckResult(TypedDict):
+    check: str       # id of the check that produced it
+    title: str       # what was checked, e.g. 'User Account Control'
+    status: str      # 'ok', 'issue', 'error' or 'timeout'
+    name: str        # short finding, e.g. 'UAC Disabled'; empty when status is 'ok'
+    issue: str       # explanation shown to the user; empty when status is 'ok'
+    duration: float  # seconds the check took (the timeout for 'timeout')
+    cached: bool
+
+
+class SecurityCheck:
+    """A self-contained check: ``fn()`` returns None when all is well, or ``{'name', 'issue'}`` for a finding."""
+
+    def __init__(self, check_id: str, title: str, fn: Callable[[], Optional[Dict[str, str]]], timeout: float = CHECK_TIMEOUT):
+        self.id = check_id
+        self.title = title
+        self.fn = fn
+        self.timeout = timeout
+
+    def run(self) -> CheckResult:
+        started = time.monotonic()
+        try:
+            finding = self.fn()
+        except FileNotFoundError:
+            logging.warning("Security check %s: registry key not found.", self.id)
+            return self._result('error', f"{self.title} Check Failed", f"Could not determine {self.title} settings (registry key not found).", started)
+        except Exception as e:
+            logging.error("Security check %s failed: %s", self.id, e)
+            return self._result('error', f"{self.title} Check Failed", f"Could not determine {self.title} status: {e}", started)
+        if finding:
+            return self._result('issue', finding['name'], finding['issue'], started)
+        return self._result('ok', '', '', started)
+
+    def _result(self, status: str, name: str, issue: str, started: float) -> CheckResult:
+        return {'check': self.id, 'title': self.title, 'status': status, 'name': name, 'issue': issue,
+                'duration': time.monotonic() - started, 'cached': False}
+
+    def timed_out(self) -> CheckResult:
+        return {'check': self.id, 'title': self.title, 'status': 'timeout', 'name': f"{self.title} Check Timed Out",
+                'issue': f"The {self.title} check did not finish within {self.timeout:g} seconds.",
+                'duration': self.timeout, 'cached': False}
+
+
+# Registered checks in display order; add new ones with @security_check.
+CHECKS: Dict[str, SecurityCheck] = {}
+
+_result_cache: Dict[str, tuple] = {}  # check id -> (monotonic time, CheckResult)
+_result_cache_lock = threading.Lock()
+
+
+def security_check(check_id: str, title: str, timeout: float = CHECK_TIMEOUT):
+    """Registers the decorated function as a check."""
+    def register(fn):
+        CHECKS[check_id] = SecurityCheck(check_id, title, fn, timeout)
+        return fn
+    return register
+
+
+def _read_hklm_value(key_path: str, name: str):
+    with WinTweaks.registry.OpenKey(HKEY_LOCAL_MACHINE, key_path) as key:
+        return WinTweaks.registry.QueryValueEx(key, name)[0]
+
+
+@security_check('uac', 'User Account Control')
+def check_uac():
+    if _read_hklm_value(r"SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\System", "EnableLUA") != 1:
+        return {'name': 'UAC Disabled', 'issue': 'User Account Control (UAC) is disabled, reducing system security.'}
+    return None
+
+
+@security_check('windows_update', 'Windows Update')
+def check_windows_update():
+    # AUOptions: 2=Notify, 3=Auto download and notify, 4=Auto download and schedule the install.
+    au_options = _read_hklm_value(r"SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update", "AUOptions")
+    if au_options != 4:
+        return {'name': 'Windows Update Not Automatic', 'issue': f'Windows Update is not configured for automatic downloads and notifications (current setting: {au_options}).'}
+    return None
+
+
+@security_check('firewall', 'Windows Firewall')
+def check_firewall():
+    if _read_hklm_value(r"SYSTEM\CurrentControlSet\Services\SharedAccess\Parameters\FirewallPolicy\StandardProfile", "EnableFirewall") != 1:
+        return {'name': 'Firewall Disabled', 'issue': 'Windows Firewall is disabled for the standard network profile.'}
+    return None
+
+
+def clear_cache():
+    with _result_cache_lock:
+        _result_cache.clear()
+
+
+def _cached(check_id: str) -> Optional[CheckResult]:
+    with _result_cache_lock:
+        entry = _result_cache.get(check_id)
+    if entry and time.monotonic() - entry[0] < CHECK_RESULT_TTL:
+        return dict(entry[1], cached=True)
+    return None
+
+
+def iter_run_checks(check_ids: Optional[List[str]] = None, cancel_event: Optional[threading.Event] = None,
+                    use_cache: bool = True) -> Iterator[ProgressEvent]:
+    """Runs checks concurrently, yielding a 'check' event as each one finishes.
+
+    Fresh cached results are yielded first without running their check. Every
+    other check gets its own daemon thread, so the scan takes as long as its
+    slowest check rather than the sum of all of them, and a check that hangs
+    past its timeout is reported as 'timeout' and abandoned. 'ok' and 'issue'
+    results are cached for CHECK_RESULT_TTL seconds. 'check' events carry the
+    CheckResult as ``result`` and the share of checks finished as
+    ``progress``; the last event has kind 'done' and carries all results in
+    registry order.
+    """
+    checks = [CHECKS[check_id] for check_id in (check_ids or CHECKS)]
+    results: Dict[str, CheckResult] = {}
+
+    def finished(result: CheckResult) -> ProgressEvent:
+        results[result['check']] = result
+        return {'kind': 'check', 'progress': 100.0 * len(results) / len(checks), 'result': result}
+
+    pending: Dict[str, float] = {}  # check id -> deadline
+    finished_queue: "queue.Queue[CheckResult]" = queue.Queue()
+    for check in checks:
+        cached = _cached(check.id) if use_cache else None
+        if cached:
+            yield finished(cached)
+            continue
+        pending[check.id] = time.monotonic() + check.timeout
+        threading.Thread(target=lambda check=check: finished_queue.put(check.run()), name=f"check-{check.id}", daemon=True).start()
+
+    while pending and not (cancel_event and cancel_event.is_set()):
+        try:
+            result = finished_queue.get(timeout=PROGRESS_POLL_SECONDS)
+        except queue.Empty:
+            result = None
+        # A result for a check no longer pending arrived after it was reported as timed out.
+        if result and pending.pop(result['check'], None) is not None:
+            if result['status'] in ('ok', 'issue'):
+                with _result_cache_lock:
+                    _result_cache[result['check']] = (time.monotonic(), result)
+            yield finished(result)
+        now = time.monotonic()
+        for check_id in [check_id for check_id, deadline in pending.items() if now >= deadline]:
+            del pending[check_id]
+            logging.warning("Security check %s timed out.", check_id)
+            yield finished(CHECKS[check_id].timed_out())
+
+    yield {'kind': 'done', 'cancelled': bool(cancel_event and cancel_event.is_set()),
+           'result': [results[check.id] for check in checks if check.id in results]}
+
+
+def run_checks(check_ids: Optional[List[str]] = None, use_cache: bool = True) -> List[CheckResult]:
+    """Blocking wrapper around iter_run_checks; returns every check's result."""
+    result: List[CheckResult] = []
+    for event in iter_run_checks(check_ids, use_cache=use_cache):
+        if event['kind'] == 'done':
+            result = event['result']
+    return result
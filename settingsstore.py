@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+SETTINGS_FILE = os.path.join("data", "settings.json")
+# Seconds without further changes before pending settings are written.
+SETTINGS_WRITE_DELAY = 0.5
+
+
+class SettingsStore:
+    """In-memory settings with debounced, atomic writes on a background thread.
+
+    Reads and ``update`` only touch the in-memory dict, so the UI never waits
+    on the disk. Each update restarts a SETTINGS_WRITE_DELAY countdown and
+    the writer thread saves once the changes stop, so a burst of edits becomes
+    one write. The file is written to a temporary file and moved into place
+    with ``os.replace``, so a crash mid-write leaves the previous settings
+    intact. ``close`` writes anything still pending and should be called on
+    exit.
+    """
+
+    def __init__(self, path: str = SETTINGS_FILE, write_delay: float = SETTINGS_WRITE_DELAY):
+        self.path = path
+        self.write_delay = write_delay
+        self._data: Dict[str, Any] = {}
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # Serializes the writer thread and flush.
+        self._version = 0
+        self._written_version = 0
+        self._last_change: Optional[float] = None  # None when nothing is pending.
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def load(self) -> Dict[str, Any]:
+        """Reads the settings file into memory; a missing or unreadable file gives empty settings."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data: Dict[str, Any] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                logging.info("Settings loaded successfully from %s.", self.path)
+            except (json.JSONDecodeError, IOError) as e:
+                logging.error("Failed to load settings from %s: %s", self.path, e)
+        else:
+            logging.info("Settings file not found. Using default settings.")
+        with self._cond:
+            self._data = data if isinstance(data, dict) else {}
+            return dict(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._cond:
+            return self._data.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        with self._cond:
+            return key in self._data
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self._data)
+
+    def update(self, changes: Dict[str, Any]):
+        """Merges changes into memory and schedules a write; returns immediately."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SettingsStore has been closed")
+            if all(key in self._data and self._data[key] == value for key, value in changes.items()):
+                return
+            self._data.update(changes)
+            self._version += 1
+            self._last_change = time.monotonic()
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, name="settings-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def set(self, key: str, value: Any):
+        self.update({key: value})
+
+    def flush(self):
+        """Writes pending changes now, on the calling thread."""
+        with self._cond:
+            if self._last_change is None:
+                return
+            data, version = dict(self._data), self._version
+            self._last_change = None
+        self._write(data, version)
+
+    def close(self):
+        """Flushes pending changes and stops the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._last_change is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._last_change + self.write_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return  # close() flushes on its own thread.
+                data, version = dict(self._data), self._version
+                self._last_change = None
+            self._write(data, version)
+
+    def _write(self, data: Dict[str, Any], version: int):
+        with self._write_lock:
+            # A flush can overtake the writer thread; never replace newer settings with older ones.
+            if version <= self._written_version:
+                return
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._written_version = version
+                logging.info("Settings saved to %s.", self.path)
+            except OSError as e:
+                logging.error("Failed to save settings to %s: %s", self.path, e)
@@ -0,0 +1,174 @@
+import inspect
+import itertools
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Threads shared by all background tasks.
+TASK_MAX_WORKERS = 4
+# Tasks of each resource class allowed to run at once; unlisted classes are only bounded by the pool.
+RESOURCE_LIMITS = {'disk': 2, 'registry': 1}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class Task:
+    """One submitted unit of work and its pollable status.
+
+    ``status`` moves from 'queued' to 'running' to one of 'done', 'failed' or
+    'cancelled'; ``progress`` follows the task's latest progress event.
+    ``cancel_event`` is the cancellation token handed to the work function.
+    """
+
+    def __init__(self, task_id: int, name: str, fn: Callable, resource: Optional[str], on_event: Optional[Callable]):
+        self.id = task_id
+        self.name = name
+        self.fn = fn
+        self.resource = resource
+        self.on_event = on_event
+        self.cancel_event = threading.Event()
+        self.status = QUEUED
+        self.progress: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def __repr__(self):
+        return f"<Task {self.id} {self.name!r} {self.status}>"
+
+
+class TaskExecutor:
+    """Runs long actions on a shared thread pool with per-resource concurrency limits.
+
+    ``submit(name, fn, resource, on_event)`` calls ``fn(cancel_event)`` on a
+    worker. If fn returns a generator of progress events (the WinTweaks
+    ``iter_*`` style), each event is passed to on_event as it is yielded;
+    otherwise its return value is passed as a 'done' event. An exception
+    becomes an 'error' event, and a task cancelled before it started gets a
+    'cancelled' event. on_event runs on the worker thread, so UI callers hand
+    it a ProgressChannel's ``post`` to get the events on the Tk thread.
+
+    A task whose resource class is at its limit waits in a per-class queue
+    without holding a pool thread, so a disk-heavy backlog cannot starve
+    registry work.
+    """
+
+    def __init__(self, max_workers: int = TASK_MAX_WORKERS, limits: Optional[Dict[str, int]] = None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self.limits = dict(RESOURCE_LIMITS if limits is None else limits)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._tasks: List[Task] = []
+        self._running: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[Task]] = {}
+        self._closed = False
+
+    def submit(self, name: str, fn: Callable, resource: Optional[str] = None, on_event: Optional[Callable] = None) -> Task:
+        task = Task(next(self._ids), name, fn, resource, on_event)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("TaskExecutor has been shut down")
+            self._tasks.append(task)
+            if self._has_slot(resource):
+                self._start(task)
+            else:
+                self._waiting.setdefault(resource, deque()).append(task)
+        return task
+
+    def tasks(self) -> List[Task]:
+        """Returns the tasks that are queued or running, oldest first."""
+        with self._lock:
+            self._tasks = [task for task in self._tasks if task.active]
+            return list(self._tasks)
+
+    def find(self, name: str) -> Optional[Task]:
+        """Returns the queued or running task with this name, if any."""
+        for task in self.tasks():
+            if task.name == name:
+                return task
+        return None
+
+    def shutdown(self):
+        """Cancels every task and stops accepting new ones; running work ends at its next cancellation check.
+
+        Tasks still waiting for a slot get their 'cancelled' event here, on the calling thread.
+        """
+        with self._lock:
+            self._closed = True
+            tasks = list(self._tasks)
+            drained: List[Task] = []
+            for waiting in self._waiting.values():
+                for task in waiting:
+                    task.status = CANCELLED
+                drained.extend(waiting)
+                waiting.clear()
+        for task in tasks:
+            task.cancel()
+        for task in drained:
+            self._emit(task, {'kind': 'cancelled'})
+        self._pool.shutdown(wait=False)
+
+    # Callers hold self._lock for the helpers below.
+
+    def _has_slot(self, resource: Optional[str]) -> bool:
+        limit = self.limits.get(resource)
+        return limit is None or self._running.get(resource, 0) < limit
+
+    def _start(self, task: Task):
+        self._running[task.resource] = self._running.get(task.resource, 0) + 1
+        self._pool.submit(self._run, task)
+
+    def _release(self, resource: Optional[str]):
+        self._running[resource] -= 1
+        if self._closed:
+            return
+        waiting = self._waiting.get(resource)
+        while waiting and self._has_slot(resource):
+            self._start(waiting.popleft())
+
+    def _emit(self, task: Task, event: Dict[str, Any]):
+        if task.on_event:
+            try:
+                task.on_event(event)
+            except Exception:
+                logging.exception("Event handler for task %r failed", task.name)
+
+    def _run(self, task: Task):
+        try:
+            if task.cancel_event.is_set():
+                task.status = CANCELLED
+                self._emit(task, {'kind': 'cancelled'})
+                return
+            task.status = RUNNING
+            outcome = task.fn(task.cancel_event)
+            if inspect.isgenerator(outcome):
+                for event in outcome:
+                    if event.get('kind') == 'progress':
+                        task.progress = event.get('progress')
+                    elif event.get('kind') == 'done':
+                        task.result = event.get('result')
+                    self._emit(task, event)
+            else:
+                task.result = outcome
+                self._emit(task, {'kind': 'done', 'result': outcome})
+            task.status = CANCELLED if task.cancel_event.is_set() else DONE
+        except Exception as e:
+            task.error = e
+            task.status = FAILED
+            logging.error("Task %r failed: %s", task.name, e)
+            self._emit(task, {'kind': 'error', 'error': e})
+        finally:
+            with self._lock:
+                self._release(task.resource)
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+# Seconds between samples, and how many samples each series keeps (10 minutes at 1 Hz).
+TELEMETRY_INTERVAL = 1.0
+TELEMETRY_HISTORY = 600
+
+
+class RingBuffer:
+    """Fixed-capacity series of floats in a preallocated array.
+
+    Appending past capacity overwrites the oldest sample, so memory use is set
+    at construction and stays flat however long the sampler runs.
+    """
+
+    def __init__(self, capacity: int = TELEMETRY_HISTORY):
+        self.capacity = capacity
+        self._data = array('d', bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def append(self, value: float):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def values(self) -> List[float]:
+        """Returns the samples oldest first."""
+        if self._count < self.capacity:
+            return self._data[:self._count].tolist()
+        return self._data[self._next:].tolist() + self._data[:self._next].tolist()
+
+    def latest(self) -> float:
+        return self._data[self._next - 1] if self._count else 0.0
+
+
+class TelemetrySampler:
+    """Samples CPU per core, memory, disk I/O and network on one background thread.
+
+    Each tick makes four non-blocking psutil calls and appends to preallocated
+    ring buffers: 'cpuN' and 'memory' in percent, and 'disk_read',
+    'disk_write', 'net_recv' and 'net_sent' in bytes per second. Readers take
+    a consistent copy with ``snapshot``; ``version`` increases once per sample
+    so a UI can skip redraws when nothing new arrived.
+    """
+
+    def __init__(self, interval: float = TELEMETRY_INTERVAL, history: int = TELEMETRY_HISTORY):
+        import psutil  # Deferred: only the telemetry panel needs it.
+        self._psutil = psutil
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.version = 0
+
+        self.core_count = len(psutil.cpu_percent(percpu=True))  # Also primes the per-core counters.
+        names = [f"cpu{i}" for i in range(self.core_count)] + ['memory', 'disk_read', 'disk_write', 'net_recv', 'net_sent']
+        self.series: Dict[str, RingBuffer] = {name: RingBuffer(history) for name in names}
+        self._last_io = self._io_counters()
+
+    def _io_counters(self):
+        disk = self._psutil.disk_io_counters()
+        net = self._psutil.net_io_counters()
+        return (time.monotonic(),
+                disk.read_bytes if disk else 0, disk.write_bytes if disk else 0,
+                net.bytes_recv if net else 0, net.bytes_sent if net else 0)
+
+    def sample(self):
+        """Takes one sample of every series."""
+        cores = self._psutil.cpu_percent(percpu=True)
+        memory = self._psutil.virtual_memory().percent
+        io = self._io_counters()
+        elapsed = max(io[0] - self._last_io[0], 1e-6)
+        # Counters can go backwards when a disk or adapter disappears; report 0 rather than a negative rate.
+        rates = [max(now - before, 0) / elapsed for now, before in zip(io[1:], self._last_io[1:])]
+        self._last_io = io
+
+        with self._lock:
+            for i, value in enumerate(cores[:self.core_count]):
+                self.series[f"cpu{i}"].append(value)
+            self.series['memory'].append(memory)
+            for name, rate in zip(('disk_read', 'disk_write', 'net_recv', 'net_sent'), rates):
+                self.series[name].append(rate)
+            self.version += 1
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        """Returns every series, oldest sample first."""
+        with self._lock:
+            return {name: buffer.values() for name, buffer in self.series.items()}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                # A failed read (e.g. counters unavailable for a moment) only loses that sample.
+                logging.debug("Telemetry sample failed: %s", e)
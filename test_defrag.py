@@ -0,0 +1,82 @@
+"""Runs the defragmentation tools against fake_defrag.py instead of defrag.exe."""
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+import wintweaks
+from wintweaks import WinTweaks
+
+FAKE_DEFRAG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_defrag.py")
+
+
+class DefragTests(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {wintweaks.DEFRAG_COMMAND_ENV: f'"{sys.executable}" "{FAKE_DEFRAG}"',
+                                               "FAKE_DEFRAG_FAIL": "E:"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_progress_is_parsed(self):
+        events = list(WinTweaks.iter_defragment_drive("C:"))
+        progress = [(event['stage'], event['progress']) for event in events if event['kind'] == 'progress']
+        self.assertEqual(progress, [(stage, float(percent)) for stage in ("Analysis", "Defragmentation")
+                                    for percent in range(0, 101, 25)])
+        self.assertEqual(events[-1]['kind'], 'done')
+        self.assertTrue(events[-1]['result'][0])
+
+    def test_failure_is_reported(self):
+        success, message = WinTweaks.defragment_drive("E:")
+        self.assertFalse(success)
+        self.assertIn("E:", message)
+
+    def test_blocking_wrapper_forwards_progress(self):
+        seen = []
+        result = WinTweaks._run_with_callback(WinTweaks.iter_defragment_drive("C:"), lambda *args: seen.append(args))
+        self.assertTrue(result[0])
+        self.assertEqual(seen[-1], (100.0, 0))
+
+    def test_drives_are_scheduled_up_to_the_limit(self):
+        os.environ["FAKE_DEFRAG_STEP"] = "0.1"
+        running, peak = set(), 0
+        for event in WinTweaks.iter_defragment_drives(["C:", "D:", "E:", "F:"], max_concurrent=2):
+            if event['kind'] == 'drive_progress':
+                running.add(event['drive'])
+                peak = max(peak, len(running))
+            elif event['kind'] == 'drive_done':
+                running.discard(event['drive'])
+            else:
+                results = event['result']
+        self.assertEqual(peak, 2)
+        self.assertEqual({drive: ok for drive, (ok, _) in results.items()},
+                         {"C:": True, "D:": True, "E:": False, "F:": True})
+
+    def test_cancel(self):
+        os.environ["FAKE_DEFRAG_STEP"] = "1"
+        cancel = threading.Event()
+        for event in WinTweaks.iter_defragment_drives(["C:", "D:", "F:"], max_concurrent=2, cancel_event=cancel):
+            if event['kind'] == 'drive_progress':
+                cancel.set()
+            elif event['kind'] == 'done':
+                self.assertTrue(event['cancelled'])
+                self.assertEqual({drive: ok for drive, (ok, _) in event['result'].items()},
+                                 {"C:": False, "D:": False, "F:": False})
+
+    def test_cancel_does_not_wait_for_a_child_holding_stdout(self):
+        os.environ["FAKE_DEFRAG_HOLD"] = "1"
+        cancel = threading.Event()
+        with mock.patch.object(wintweaks, 'DEFRAG_TERMINATE_TIMEOUT', 1):
+            started = None
+            for event in WinTweaks.iter_defragment_drive("C:", cancel):
+                if event['kind'] == 'progress' and not cancel.is_set():
+                    started = time.monotonic()
+                    cancel.set()
+        self.assertTrue(event['cancelled'])
+        self.assertLess(time.monotonic() - started, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Headless command line for scripted use: apply tweak profiles and run maintenance without Tk.
+
+    python wctb_cli.py apply --profile data/settings.json
+    python wctb_cli.py clean temp --dry-run --json
+    python wctb_cli.py startup list --json
+
+Exit status is 0 on success, 1 if the operation failed and 2 for usage errors.
+"""
+import argparse
+import json
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+
+from applog import setup_logging
+from wintweaks import WinTweaks, RegistryTransaction
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+def _emit(args, payload: Dict[str, Any], lines: List[str]):
+    """Prints payload as one JSON document with --json, otherwise the human-readable lines."""
+    if args.json:
+        json.dump(payload, sys.stdout, indent=2, default=str)
+        sys.stdout.write("\n")
+    else:
+        for line in lines:
+            print(line)
+
+
+def cmd_apply(args) -> int:
+    try:
+        with open(args.profile, 'r') as f:
+            profile = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        _emit(args, {'command': 'apply', 'success': False, 'error': f"Could not read profile {args.profile}: {e}"},
+              [f"Could not read profile {args.profile}: {e}"])
+        return EXIT_FAILED
+    if not isinstance(profile, dict):
+        _emit(args, {'command': 'apply', 'success': False, 'error': "Profile must be a JSON object."},
+              ["Profile must be a JSON object."])
+        return EXIT_FAILED
+
+    txn = RegistryTransaction()
+    success, error, results = WinTweaks.apply_tweak_settings(profile, txn)
+    lines = [f"{result['id']}: {result['value']}" + (f" ({result['message']})" if result['message'] else "") for result in results]
+    lines.append(f"{len(txn.written)} value(s) changed, {len(txn.skipped)} already up to date." if success
+                 else f"Failed, no changes were made: {error}")
+    _emit(args, {'command': 'apply', 'profile': args.profile, 'success': success, 'error': error,
+                 'tweaks': results, 'written': txn.written, 'skipped': txn.skipped}, lines)
+    return EXIT_OK if success and all(result['success'] for result in results) else EXIT_FAILED
+
+
+def cmd_clean_temp(args) -> int:
+    if args.dry_run:
+        directories = WinTweaks.scan_temporary_files()
+        total = sum(directory['bytes'] for directory in directories)
+        _emit(args, {'command': 'clean temp', 'dry_run': True, 'directories': directories, 'bytes': total},
+              [f"{directory['path']}: {directory['bytes'] / (1024 * 1024):.2f} MB in {directory['files']} file(s)" for directory in directories]
+              + [f"{total / (1024 * 1024):.2f} MB can be freed."])
+        return EXIT_OK
+
+    cleaned_mb, errors = WinTweaks.clean_temporary_files()
+    # The process is about to exit, so finish the staged deletions here rather than on the purger thread.
+    left = WinTweaks.purger.purge_pending()
+    lines = [f"Freed {cleaned_mb:.2f} MB."]
+    if left:
+        lines.append(f"{left} staged item(s) will be deleted on the next run.")
+    if errors:
+        lines.append(f"{len(errors)} item(s) could not be deleted ({errors.summary()}).")
+        lines.extend(errors)
+    _emit(args, {'command': 'clean temp', 'dry_run': False, 'cleaned_mb': round(cleaned_mb, 2),
+                 'failed': len(errors), 'failed_by_errno': {str(code): count for code, count in errors.counts.items()},
+                 'failed_samples': list(errors), 'purge_pending': left}, lines)
+    # Locked temp files are normal; only report failure when nothing at all could be deleted.
+    return EXIT_FAILED if errors and not cleaned_mb else EXIT_OK
+
+
+def cmd_startup_list(args) -> int:
+    programs = WinTweaks.get_startup_programs()
+    _emit(args, {'command': 'startup list', 'programs': programs},
+          [f"[{'x' if program['enabled'] else ' '}] {program['name']} ({program['scope']}/{program['source']}): {program['path']}" for program in programs])
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="print the result as JSON")
+    common.add_argument("-v", "--verbose", action="store_true", help="also log to stderr")
+
+    parser = argparse.ArgumentParser(prog="wctb", description="Windows Tool Basic Customization, headless.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    apply_parser = commands.add_parser("apply", parents=[common], help="apply the tweaks in a settings profile")
+    apply_parser.add_argument("--profile", required=True, help="settings JSON, as saved by the GUI")
+    apply_parser.set_defaults(handler=cmd_apply)
+
+    clean_parser = commands.add_parser("clean", help="free disk space")
+    clean_targets = clean_parser.add_subparsers(dest="target", required=True)
+    temp_parser = clean_targets.add_parser("temp", parents=[common], help="delete temporary files")
+    temp_parser.add_argument("--dry-run", action="store_true", help="only report how much would be freed")
+    temp_parser.set_defaults(handler=cmd_clean_temp)
+
+    startup_parser = commands.add_parser("startup", help="startup programs")
+    startup_actions = startup_parser.add_subparsers(dest="action", required=True)
+    startup_actions.add_parser("list", parents=[common], help="list startup programs").set_defaults(handler=cmd_startup_list)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(logging.INFO if args.verbose else logging.WARNING)
+    console.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    setup_logging(extra_handlers=(console,))
+    logging.info("CLI command: %s", " ".join(sys.argv[1:] if argv is None else argv))
+    try:
+        return args.handler(args)
+    except Exception as e:
+        logging.exception("CLI command failed")
+        _emit(args, {'command': args.command, 'success': False, 'error': str(e)}, [f"Error: {e}"])
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
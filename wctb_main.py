@@ -1,32 +1,35 @@
+import time
+_PROCESS_START = time.perf_counter()  # Reference point for the startup timing report
+
 import tkinter as tk
 from tkinter import font, ttk
-import tkinter.messagebox as messagebox
-import platform
-import psutil
-import time
 import os
-import json
-from typing import List, Tuple
-import threading
+import sys
+from typing import List, Optional, Tuple
+from contextlib import contextmanager
+import queue
 import logging
-import subprocess
-import webbrowser
-from ctypes import wintypes
 
-from wintweaks import WinTweaks
+from tasks import TaskExecutor
+from settingsstore import SettingsStore
+from applog import setup_logging
+# platform, psutil and wintweaks (and through it the registry and file tools)
+# are imported by the features that use them, so the PIN screen comes up
+# without paying for them.
 
 correct_pass = "6121"  # must be STRING if comparing to Entry input
-SETTINGS_FILE = os.path.join("data", "settings.json")
+PROGRESS_MAX_FPS = 10  # Maximum progress repaints per second from background jobs
+TASK_STATUS_POLL_MS = 500  # How often the footer re-reads the running tasks
+DUPLICATE_GROUPS_SHOWN = 500  # Largest duplicate groups listed in the results window
+# Set this environment variable (to anything but "0") or pass the flag to log startup phase timings.
+STARTUP_TIMING_ENV = "WCTB_STARTUP_TIMING"
+STARTUP_TIMING_FLAG = "--startup-timing"
 
-# --- Setup Logging ---
-if not os.path.exists("data"):
-    os.makedirs("data")
+_IMPORTS_DONE = time.perf_counter()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename=os.path.join('data', 'app.log'),
-    filemode='a')
+# --- Setup Logging ---
+# Records go through a queue to a rotating file on a listener thread; see applog.
+setup_logging()
 
 # --- Theme Definitions ---
 THEMES = {
@@ -48,6 +51,87 @@ THEMES = {
 }
 
 
+class StartupTimer:
+    """Milliseconds spent in each startup phase, for tracking cold-start regressions.
+
+    Each phase is logged as it completes, and ``report`` logs them all on one
+    line. When disabled every method is a no-op, so the calls can stay in place.
+    """
+
+    def __init__(self, enabled: bool, start: float = _PROCESS_START):
+        self.enabled = enabled
+        self.start = start
+        self.phases: List[Tuple[str, float]] = []
+
+    @classmethod
+    def from_environment(cls, argv=None) -> "StartupTimer":
+        argv = sys.argv[1:] if argv is None else argv
+        return cls(os.getenv(STARTUP_TIMING_ENV, "0") != "0" or STARTUP_TIMING_FLAG in argv)
+
+    def record(self, phase: str, began: float, ended: Optional[float] = None):
+        """Records the time between two perf_counter readings as ``phase``."""
+        if not self.enabled:
+            return
+        ms = ((time.perf_counter() if ended is None else ended) - began) * 1000
+        self.phases.append((phase, ms))
+        logging.info("Startup timing: %s %.1f ms", phase, ms)
+
+    @contextmanager
+    def measure(self, phase: str):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, began)
+
+    def since_start(self, phase: str):
+        """Records the time from process start until now, e.g. the first frame on screen."""
+        self.record(phase, self.start)
+
+    def report(self):
+        if self.enabled and self.phases:
+            logging.info("Startup timing report: %s", ", ".join(f"{phase} {ms:.1f} ms" for phase, ms in self.phases))
+
+
+class StyleRegistry:
+    """Records themed widgets with the colour role of each of their options.
+
+    ``register(widget, bg="bg", fg="fg")`` remembers that the widget's bg and
+    fg follow the theme's "bg" and "fg" colours, so ``restyle`` can recolour
+    the live widget tree in one pass instead of rebuilding it. Widgets whose
+    colours depend on state, such as the selected menu row, add a hook instead.
+    Destroyed widgets and hooks are dropped on the next restyle.
+    """
+    def __init__(self):
+        self._widgets = []
+        self._hooks = []
+
+    def register(self, widget, **roles):
+        self._widgets.append((widget, roles))
+        return widget
+
+    def add_hook(self, hook):
+        self._hooks.append(hook)
+
+    def restyle(self, colors):
+        alive = []
+        for widget, roles in self._widgets:
+            try:
+                widget.config(**{option: colors[role] for option, role in roles.items()})
+            except tk.TclError:
+                continue
+            alive.append((widget, roles))
+        self._widgets = alive
+
+        hooks = []
+        for hook in self._hooks:
+            try:
+                hook()
+            except tk.TclError:
+                continue
+            hooks.append(hook)
+        self._hooks = hooks
+
 
 class BIOSOptionMenu:
     """Manages a list of interactive, keyboard-navigable BIOS-style options."""
@@ -59,11 +143,12 @@ class BIOSOptionMenu:
         self.visible_options = []
         self.current_selection_index = 0
 
-        self.container = tk.Frame(parent, bg="black")
+        self.app = app_instance # Reference to the main application
+        self.container = self.app.styles.register(tk.Frame(parent, bg=self.app.current_theme_colors["bg"]), bg="bg")
         self.container.pack(fill="both", expand=True, padx=20, pady=10)
 
-        self.app = app_instance # Reference to the main application
         self.rebuild_options_ui()
+        self.app.styles.add_hook(self.restyle)
 
         self.container.focus_set()
         self.container.bind("<Up>", self.move_selection_up)
@@ -73,11 +158,14 @@ class BIOSOptionMenu:
         self.container.bind("<Return>", self.toggle_category)
 
     def rebuild_options_ui(self):
+        """Builds one row per option and indexes category rows by id and children by category."""
         for widget in self.container.winfo_children():
             widget.destroy()
         
         self.options = []
         self.visible_options = []
+        self.categories = {}  # category id -> row info
+        self.children_by_category = {}  # category id -> row infos of its options, in order
 
         for data in self.options_data:
             is_category = data['type'] == 'category'
@@ -98,11 +186,16 @@ class BIOSOptionMenu:
 
             option_info = {'frame': option_frame, 'name_label': name_label, 'value_label': value_label, 'data': data}
             self.options.append(option_info)
+            if is_category:
+                self.categories[data['id']] = option_info
+                self.children_by_category.setdefault(data['id'], [])
+            elif 'category_id' in data:
+                self.children_by_category.setdefault(data['category_id'], []).append(option_info)
 
             is_visible = True
             if 'category_id' in data:
-                parent_cat = next((cat for cat in self.options_data if cat['type'] == 'category' and cat['id'] == data['category_id']), None)
-                if parent_cat and parent_cat.get('collapsed', False):
+                parent_cat = self.categories.get(data['category_id'])
+                if parent_cat and parent_cat['data'].get('collapsed', False):
                     is_visible = False
             
             if is_visible:
@@ -111,46 +204,70 @@ class BIOSOptionMenu:
 
         self.update_selection_highlight()
 
+    def _paint_row(self, option, is_selected):
+        is_category = option['data']['type'] == 'category'
+        bg = self.app.current_theme_colors["highlight_bg"] if is_selected else self.app.current_theme_colors["bg"]
+        fg = self.app.current_theme_colors["highlight_fg"] if is_selected else (self.app.current_theme_colors["category_fg"] if is_category else self.app.current_theme_colors["fg"])
+
+        option['frame'].config(bg=bg)
+        option['name_label'].config(bg=bg, fg=fg)
+        if option['value_label']:
+            option['value_label'].config(bg=bg, fg=self.app.current_theme_colors["value_fg"])
+
+    def restyle(self):
+        """Repaints every row, including collapsed ones, after a theme change."""
+        selected = self.visible_options[self.current_selection_index] if self.visible_options else None
+        for option in self.options:
+            self._paint_row(option, option is selected)
+
     def update_selection_highlight(self):
+        """Repaints every visible row; selection moves only repaint two rows via _move_selection."""
         if not self.visible_options: return
 
         for i, option in enumerate(self.visible_options):
-            is_selected = (i == self.current_selection_index)
-            is_category = option['data']['type'] == 'category'
-            bg = self.app.current_theme_colors["highlight_bg"] if is_selected else self.app.current_theme_colors["bg"]
-            fg = self.app.current_theme_colors["highlight_fg"] if is_selected else (self.app.current_theme_colors["category_fg"] if is_category else self.app.current_theme_colors["fg"])
-            
-            option['frame'].config(bg=bg)
-            option['name_label'].config(bg=bg, fg=fg)
-            if option['value_label']:
-                option['value_label'].config(bg=bg)
+            self._paint_row(option, i == self.current_selection_index)
+
+    def _move_selection(self, new_index):
+        old_option = self.visible_options[self.current_selection_index]
+        self.current_selection_index = new_index
+        self._paint_row(old_option, False)
+        self._paint_row(self.visible_options[new_index], True)
                 
     def move_selection_up(self, event=None):
         if self.current_selection_index > 0:
-            self.current_selection_index -= 1
-            self.update_selection_highlight()
+            self._move_selection(self.current_selection_index - 1)
 
     def move_selection_down(self, event=None):
         if self.current_selection_index < len(self.visible_options) - 1:
-            self.current_selection_index += 1
-            self.update_selection_highlight()
+            self._move_selection(self.current_selection_index + 1)
 
     def toggle_category(self, event=None):
+        """Collapses or expands the selected category, packing or forgetting only its children."""
         if not self.visible_options: return
-        selected_option_data = self.visible_options[self.current_selection_index]['data']
-        if selected_option_data['type'] == 'category':
-            selected_option_data['collapsed'] = not selected_option_data.get('collapsed', False)
-            
-            full_list_index = self.options.index(self.visible_options[self.current_selection_index])
-            self.rebuild_options_ui()
+        selected_option = self.visible_options[self.current_selection_index]
+        selected_option_data = selected_option['data']
+        if selected_option_data['type'] != 'category':
+            return
 
-            try:
-                new_visible_option = self.options[full_list_index]
-                self.current_selection_index = self.visible_options.index(new_visible_option)
-            except (ValueError, IndexError):
-                self.current_selection_index = 0
-            
-            self.update_selection_highlight()
+        collapsed = not selected_option_data.get('collapsed', False)
+        selected_option_data['collapsed'] = collapsed
+        prefix = "▸" if collapsed else "▾"
+        selected_option['name_label'].config(text=f"{prefix} {selected_option_data['name']}")
+
+        children = self.children_by_category.get(selected_option_data['id'], [])
+        # A category's children always directly follow it in visible_options.
+        insert_at = self.current_selection_index + 1
+        if collapsed:
+            for child in children:
+                child['frame'].pack_forget()
+            del self.visible_options[insert_at:insert_at + len(children)]
+        else:
+            previous_frame = selected_option['frame']
+            for child in children:
+                child['frame'].pack(fill="x", pady=1, after=previous_frame)
+                self._paint_row(child, False)
+                previous_frame = child['frame']
+            self.visible_options[insert_at:insert_at] = children
 
     def change_value(self, direction):
         if not self.visible_options: return
@@ -187,7 +304,7 @@ class BIOSActionMenu:
         self.current_selection_index = 0
 
         self.app = app_instance # Reference to the main application
-        self.container = tk.Frame(parent, bg="black")
+        self.container = self.app.styles.register(tk.Frame(parent, bg=self.app.current_theme_colors["bg"]), bg="bg")
         self.container.pack(fill="both", expand=True, padx=20, pady=10)
 
         for data in self.actions_data:
@@ -205,6 +322,7 @@ class BIOSActionMenu:
         self.container.bind("<Return>", self.execute_action)
         
         self.update_selection_highlight()
+        self.app.styles.add_hook(self.update_selection_highlight)
 
 
     def update_selection_highlight(self):
@@ -232,13 +350,9 @@ class BIOSActionMenu:
         callback = selected_action_data.get('callback')
         
         if callback:
-            # Show a busy cursor
-            self.container.config(cursor="watch")
-            self.app.root.update_idletasks()
+            # Long-running callbacks submit their work to the app's TaskExecutor and return at once.
             callback()
 
-            self.container.config(cursor="")
-
 class CustomDialog(tk.Toplevel):
     """A custom, UEFI-styled dialog window."""
     def __init__(self, parent, title, message, dialog_type="info"):
@@ -288,6 +402,189 @@ class CustomDialog(tk.Toplevel):
         self.wait_window()
 
 
+class ProgressChannel:
+    """Thread-safe event channel from background jobs to the Tk thread.
+
+    Workers call ``post`` from any thread; nothing there touches Tk. The UI
+    thread drains the queue on a fixed ``root.after`` tick. Only the newest
+    'progress' event of each tick is rendered, so the UI repaints at most
+    ``max_fps`` times per second however fast events arrive. Every other event
+    kind is dispatched in order to its handler.
+    """
+    def __init__(self, root, handlers, max_fps=PROGRESS_MAX_FPS):
+        self.root = root
+        self.handlers = handlers
+        self.tick_ms = max(1, int(1000 / max_fps))
+        self._queue = queue.Queue()
+        self._after_id = None
+        self._closed = False
+
+    def post(self, event):
+        """Queues an event; safe to call from any thread."""
+        self._queue.put(event)
+
+    def start(self):
+        self._after_id = self.root.after(self.tick_ms, self._drain)
+
+    def close(self):
+        self._closed = True
+        if self._after_id:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _drain(self):
+        self._after_id = None
+        latest_progress = None
+        while not self._closed:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event['kind'] == 'progress':
+                latest_progress = event
+                continue
+            if latest_progress:
+                self._dispatch(latest_progress)
+                latest_progress = None
+            self._dispatch(event)
+
+        if latest_progress and not self._closed:
+            self._dispatch(latest_progress)
+        if not self._closed:
+            self._after_id = self.root.after(self.tick_ms, self._drain)
+
+    def _dispatch(self, event):
+        handler = self.handlers.get(event['kind'])
+        if handler:
+            handler(event)
+
+
+class TelemetryPanel:
+    """Sparklines of a TelemetrySampler's history, all drawn on one Canvas.
+
+    Every text and line item is created once; a refresh only moves them with
+    ``coords`` and sets their text. The panel polls the sampler once per
+    interval and skips the redraw when there is no new sample or the canvas is
+    not on screen. Destroying the canvas stops the sampler.
+    """
+    CORE_COLUMNS = 4
+    CORE_ROW_HEIGHT = 34
+    ROW_HEIGHT = 52
+    PAD = 6
+
+    def __init__(self, parent, sampler, font, app_instance):
+        self.sampler = sampler
+        self.font = font
+        self.app = app_instance
+        self._version = -1
+        self._after_id = None
+        colors = self.app.current_theme_colors
+
+        core_rows = -(-sampler.core_count // self.CORE_COLUMNS)
+        height = core_rows * self.CORE_ROW_HEIGHT + 3 * self.ROW_HEIGHT + self.PAD
+        self.canvas = self.app.styles.register(tk.Canvas(parent, height=height, bg=colors["bg"], highlightthickness=1,
+                                                         highlightbackground=colors["border"]), bg="bg", highlightbackground="border")
+        # (label item, [(series name, line item, colour role)]) per plot cell.
+        self.cells = []
+        for i in range(sampler.core_count):
+            self._add_cell([f"cpu{i}"])
+        for names in (['memory'], ['disk_read', 'disk_write'], ['net_recv', 'net_sent']):
+            self._add_cell(names)
+
+        self.canvas.bind("<Configure>", lambda e: self.refresh(force=True))
+        self.canvas.bind("<Destroy>", self._on_destroy)
+        self.app.styles.add_hook(self.restyle)
+        self.sampler.start()
+        self._schedule()
+
+    def _add_cell(self, names):
+        colors = self.app.current_theme_colors
+        label = self.canvas.create_text(0, 0, anchor="nw", font=self.font, fill=colors["fg"])
+        lines = []
+        for n, name in enumerate(names):
+            role = "value_fg" if n == 0 else "category_fg"
+            lines.append((name, self.canvas.create_line(0, 0, 0, 0, fill=colors[role]), role))
+        self.cells.append((label, lines))
+
+    def _cell_boxes(self, width):
+        """Yields (x, y, w, h) for each cell: a grid of cores, then full-width rows."""
+        core_width = (width - self.PAD) / self.CORE_COLUMNS
+        for i in range(self.sampler.core_count):
+            row, column = divmod(i, self.CORE_COLUMNS)
+            yield (self.PAD + column * core_width, self.PAD + row * self.CORE_ROW_HEIGHT,
+                   core_width - self.PAD, self.CORE_ROW_HEIGHT - self.PAD)
+        top = self.PAD + -(-self.sampler.core_count // self.CORE_COLUMNS) * self.CORE_ROW_HEIGHT
+        for i in range(3):
+            yield (self.PAD, top + i * self.ROW_HEIGHT, width - 2 * self.PAD, self.ROW_HEIGHT - self.PAD)
+
+    @staticmethod
+    def _rate(value):
+        return f"{value / (1024 * 1024):.1f} MB/s"
+
+    def _label_text(self, index, data):
+        cores = self.sampler.core_count
+        latest = {name: (values[-1] if values else 0.0) for name, values in data.items()}
+        if index < cores:
+            return f"CPU {index}: {latest[f'cpu{index}']:.0f}%"
+        if index == cores:
+            return f"Memory: {latest['memory']:.0f}%"
+        if index == cores + 1:
+            return f"Disk: read {self._rate(latest['disk_read'])}, write {self._rate(latest['disk_write'])}"
+        return f"Network: in {self._rate(latest['net_recv'])}, out {self._rate(latest['net_sent'])}"
+
+    def refresh(self, force=False):
+        """Redraws the sparklines if there is a new sample (or ``force``) and the canvas is visible."""
+        if not self.canvas.winfo_ismapped() or (not force and self.sampler.version == self._version):
+            return
+        self._version = self.sampler.version
+        data = self.sampler.snapshot()
+        capacity = self.sampler.series['memory'].capacity
+        text_height = self.font.metrics("linespace")
+
+        for index, ((label, lines), (x, y, w, h)) in enumerate(zip(self.cells, self._cell_boxes(self.canvas.winfo_width()))):
+            self.canvas.coords(label, x, y)
+            self.canvas.itemconfig(label, text=self._label_text(index, data))
+            plot_top, plot_height = y + text_height, max(h - text_height, 1)
+            # Percent series share a fixed 0-100 scale; rate rows scale to their busiest moment in the window.
+            peak = 100.0 if len(lines) == 1 else max([max(data[name], default=0.0) for name, _, _ in lines] + [1.0])
+            step = w / max(capacity - 1, 1)
+            for name, line, _ in lines:
+                values = data[name]
+                if len(values) < 2:
+                    self.canvas.coords(line, 0, 0, 0, 0)
+                    continue
+                # Right-align so the newest sample is always at the right edge.
+                x0 = x + w - (len(values) - 1) * step
+                points = []
+                for n, value in enumerate(values):
+                    points.append(x0 + n * step)
+                    points.append(plot_top + plot_height * (1 - min(value / peak, 1.0)))
+                self.canvas.coords(line, *points)
+
+    def restyle(self):
+        colors = self.app.current_theme_colors
+        for label, lines in self.cells:
+            self.canvas.itemconfig(label, fill=colors["fg"])
+            for _, line, role in lines:
+                self.canvas.itemconfig(line, fill=colors[role])
+
+    def _schedule(self):
+        self._after_id = self.canvas.after(int(self.sampler.interval * 1000), self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        self.refresh()
+        self._schedule()
+
+    def _on_destroy(self, event):
+        if event.widget is not self.canvas:
+            return
+        self.sampler.stop()
+        if self._after_id:
+            self.canvas.after_cancel(self._after_id)
+            self._after_id = None
+
+
 class StartupWindow(tk.Toplevel):
     """Custom Toplevel window for managing startup programs."""
     def __init__(self, parent):
@@ -297,11 +594,12 @@ class StartupWindow(tk.Toplevel):
 
 class Application:
     """Main application class for WTBC."""
-    def __init__(self, root):
+    def __init__(self, root, startup_timer: Optional[StartupTimer] = None):
         self.root = root
         self.root.attributes("-fullscreen", True)
         self.root.configure(bg="black")
         self.root.title("WTBC - Windows Tool Basic Customization")
+        self.startup_timer = startup_timer if startup_timer is not None else StartupTimer(False)
         self.root.overrideredirect(True) # Remove default title bar
         self._offset_x = 0
         self._offset_y = 0
@@ -311,27 +609,38 @@ class Application:
         self.current_theme_colors = THEMES[self.current_theme_name]
 
         self.pin_frame = None
+        self.progress_window = None
+        self.progress_action = "Processing"  # Label of the job shown in the progress window
         self.clock_update_id = None # To store the after ID for clock updates
         self.about_label = None
         self.about_frame = None
-        self.settings = {}
+        self.settings = SettingsStore()
         self.main_app_frame = None
         self.tweaks_menu = None
         self.optimizations_menu = None
         self.appearance_menu = None
         self.security_menu = None
+        self.tweaks_options_data = []
+        self.telemetry_panel = None
+        self.tasks = TaskExecutor()
+        self.task_status_label = None
+        self.styles = StyleRegistry()
+        self.tab_labels = {}
+        self.current_tab = None
 
 
         # --- Define Fonts ---
-        self.default_font = font.Font(family="Consolas", size=12)
-        self.header_font = font.Font(family="Consolas", size=14, weight="bold")
-        try:
-            self.clock_font = font.Font(family="DSEG7 Classic", size=14)
-        except tk.TclError:
-            logging.warning("DSEG7 Classic font not found. Falling back to default.")
-            self.clock_font = self.header_font # Fallback font
+        with self.startup_timer.measure("fonts"):
+            self.default_font = font.Font(family="Consolas", size=12)
+            self.header_font = font.Font(family="Consolas", size=14, weight="bold")
+            try:
+                self.clock_font = font.Font(family="DSEG7 Classic", size=14)
+            except tk.TclError:
+                logging.warning("DSEG7 Classic font not found. Falling back to default.")
+                self.clock_font = self.header_font # Fallback font
 
-        self.load_settings()
+        with self.startup_timer.measure("load_settings"):
+            self.load_settings()
         self.apply_theme(self.current_theme_name) # Apply theme after loading settings
         self.create_pin_screen()
         logging.info("Application initialized.")
@@ -339,23 +648,10 @@ class Application:
         self.version = "0.7.0"
 
     def load_settings(self):
-        """Loads settings from the JSON file or creates defaults."""
-        if not os.path.exists("data"):
-            os.makedirs("data")
-
-        if os.path.exists(SETTINGS_FILE):
-            try:
-                with open(SETTINGS_FILE, 'r') as f:
-                    self.settings = json.load(f)
-                logging.info("Settings loaded successfully from %s.", SETTINGS_FILE)
-                if 'theme' in self.settings and self.settings['theme'] in THEMES:
-                    self.current_theme_name = self.settings['theme']
-            except (json.JSONDecodeError, IOError) as e:
-                logging.error("Failed to load settings from %s: %s", SETTINGS_FILE, e)
-                self.settings = {}
-        else:
-            self.settings = {}
-            logging.info("Settings file not found. Using default settings.")
+        """Loads the saved settings into the settings store."""
+        settings = self.settings.load()
+        if settings.get('theme') in THEMES:
+            self.current_theme_name = settings['theme']
 
     def apply_theme(self, theme_name):
         """Applies the selected theme to all UI elements."""
@@ -368,21 +664,48 @@ class Application:
         
         # Reconfigure root window background
         self.root.configure(bg=self.current_theme_colors["bg"])
-
-    def show_progress_window(self):
-        """Creates and displays a progress window with a progress bar."""
+        # Recolour the live widget tree in place; menus keep their selection and option values.
+        self.styles.restyle(self.current_theme_colors)
+        self._paint_tabs()
+
+    def _paint_tabs(self):
+        """Highlights the current tab label."""
+        for name, label in self.tab_labels.items():
+            selected = name == self.current_tab
+            label.config(bg=self.current_theme_colors["highlight_bg"] if selected else self.current_theme_colors["bg"],
+                         fg=self.current_theme_colors["highlight_fg"] if selected else self.current_theme_colors["fg"])
+
+    def show_progress_window(self, cancel_event=None, action="Processing"):
+        """Creates and displays a progress window with a progress bar.
+
+        action names the job in the label, e.g. "Cleaning". If cancel_event is
+        given, a Cancel button sets it.
+        """
+        self.progress_action = action
         self.progress_window = tk.Toplevel(self.root)
         self.progress_window.title("Progress")
         self.progress_window.configure(bg=self.current_theme_colors["bg"], highlightbackground=self.current_theme_colors["border"], highlightthickness=1)
-        self.progress_window.geometry("400x100")
+        self.progress_window.geometry("400x170" if cancel_event else "400x130")
         self.progress_window.transient(self.root)
         self.progress_window.grab_set()
         
-        self.progress_label = tk.Label(self.progress_window, text="Processing...", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"])
+        self.progress_label = tk.Label(self.progress_window, text=f"{action}...", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"])
         self.progress_label.pack(pady=5)
         
         self.progress_bar = ttk.Progressbar(self.progress_window, mode='determinate', length=300)
         self.progress_bar.pack(pady=10)
+
+        self.progress_stats_label = tk.Label(self.progress_window, text="", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"])
+        self.progress_stats_label.pack()
+
+        if cancel_event:
+            def on_cancel():
+                cancel_event.set()
+                cancel_button.config(state="disabled")
+                self.progress_label.config(text="Cancelling...")
+
+            cancel_button = tk.Button(self.progress_window, text="Cancel", font=self.default_font, command=on_cancel, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"])
+            cancel_button.pack(pady=5)
         
         self.progress_window.update_idletasks()
 
@@ -390,8 +713,20 @@ class Application:
         """Updates the progress bar and label in the progress window."""
         if self.progress_window and self.progress_window.winfo_exists():
             self.progress_bar["value"] = progress
-            self.progress_label.config(text=f"Cleaning... ({progress:.1f}%)")
-            self.progress_window.update_idletasks() # Changed to use theme colors
+            self.progress_label.config(text=f"{self.progress_action}... ({progress:.1f}%)")
+
+    def update_progress_from_event(self, event):
+        """Renders a progress event: bar, percentage, throughput and ETA."""
+        self.update_progress_bar(event['progress'], event['bytes'])
+        if not (self.progress_window and self.progress_window.winfo_exists()) or 'eta' not in event:
+            return
+        eta = event['eta']
+        eta_text = time.strftime('%H:%M:%S', time.gmtime(eta)) if eta is not None else "--:--:--"
+        self.progress_stats_label.config(text=(
+            f"{event['bytes_done'] / (1024 * 1024):.0f} / {event['bytes_total'] / (1024 * 1024):.0f} MB, "
+            f"{event['files_done']} / {event['files_total']} files\n"
+            f"{event['bytes_per_sec'] / (1024 * 1024):.1f} MB/s, {event['files_per_sec']:.0f} files/s, ETA {eta_text}"
+        ))
 
     def close_progress_window(self):
         """Closes and destroys the progress window."""
@@ -426,6 +761,11 @@ class Application:
                 code_var.set("")
 
         entry.bind("<Return>", on_enter)
+
+        def on_map(event):
+            self.pin_frame.unbind("<Map>", map_binding)
+            self.startup_timer.since_start("PIN screen mapped")
+        map_binding = self.pin_frame.bind("<Map>", on_map)
         self.pin_frame.pack(fill="both", expand=True)
 
     def show_main_app(self):
@@ -434,13 +774,21 @@ class Application:
             self.pin_frame = None
         
         try:
-            self.create_main_app_window()
+            with self.startup_timer.measure("main window built"):
+                self.create_main_app_window()
         except Exception as e:
             logging.error("Fatal error creating main app window: %s", e, exc_info=True)
             return
+        self.startup_timer.report()
         
         if self.main_app_frame:
             self.main_app_frame.pack(fill="both", expand=True)
+        self.resume_background_purge()
+
+    def resume_background_purge(self):
+        """Starts the background purger so deletions staged before a crash or exit are finished."""
+        from wintweaks import WinTweaks
+        WinTweaks.purger.start()
 
     def create_main_app_window(self):
         """Create the main UEFI-styled application window."""
@@ -449,19 +797,20 @@ class Application:
             self.root.after_cancel(self.clock_update_id)
             self.clock_update_id = None
 
-        self.main_app_frame = tk.Frame(self.root, bg=self.current_theme_colors["bg"])
+        style = self.styles.register
+        self.main_app_frame = style(tk.Frame(self.root, bg=self.current_theme_colors["bg"]), bg="bg")
 
-        main_container = tk.Frame(self.main_app_frame, bg=self.current_theme_colors["bg"], highlightbackground=self.current_theme_colors["border"], highlightthickness=2)
+        main_container = style(tk.Frame(self.main_app_frame, bg=self.current_theme_colors["bg"], highlightbackground=self.current_theme_colors["border"], highlightthickness=2), bg="bg", highlightbackground="border")
         main_container.pack(fill="both", expand=True, padx=5, pady=5)
 
         # --- Header ---
-        title_bar = tk.Frame(main_container, bg=self.current_theme_colors["header_bg"])
+        title_bar = style(tk.Frame(main_container, bg=self.current_theme_colors["header_bg"]), bg="header_bg")
         title_bar.pack(side="top", fill="x")
 
-        title_label = tk.Label(title_bar, text="WTBC Setup Utility", font=self.default_font, bg=self.current_theme_colors["header_bg"], fg=self.current_theme_colors["header_fg"])
+        title_label = style(tk.Label(title_bar, text="WTBC Setup Utility", font=self.default_font, bg=self.current_theme_colors["header_bg"], fg=self.current_theme_colors["header_fg"]), bg="header_bg", fg="header_fg")
         title_label.pack(side="left", padx=10)
 
-        close_button = tk.Button(title_bar, text="X", font=self.default_font, command=self.exit_app, bg=self.current_theme_colors["header_bg"], fg=self.current_theme_colors["header_fg"], relief="flat", activebackground="red", activeforeground="white")
+        close_button = style(tk.Button(title_bar, text="X", font=self.default_font, command=self.exit_app, bg=self.current_theme_colors["header_bg"], fg=self.current_theme_colors["header_fg"], relief="flat", activebackground="red", activeforeground="white"), bg="header_bg", fg="header_fg")
         close_button.pack(side="right")
 
         def on_drag_start(event):
@@ -478,17 +827,17 @@ class Application:
         title_label.bind("<ButtonPress-1>", on_drag_start)
         title_label.bind("<B1-Motion>", on_drag_motion)
 
-        header_frame = tk.Frame(main_container, bg=self.current_theme_colors["header_bg"]) # Changed to use theme colors
+        header_frame = style(tk.Frame(main_container, bg=self.current_theme_colors["header_bg"]), bg="header_bg") # Changed to use theme colors
         header_frame.pack(side="top", fill="x") # Changed to use theme colors
-        header_label = tk.Label(
+        header_label = style(tk.Label(
             header_frame, text="WTBC Setup Utility - Main Menu", font=self.header_font,
             bg=self.current_theme_colors["header_bg"], fg=self.current_theme_colors["header_fg"], pady=5
-        )
+        ), bg="header_bg", fg="header_fg")
         header_label.pack(side="left", padx=10)
 
-        clock_label = tk.Label(
+        clock_label = style(tk.Label(
             header_frame, text="", font=self.clock_font, bg=self.current_theme_colors["header_bg"], fg=self.current_theme_colors["clock_fg"], pady=5
-        )
+        ), bg="header_bg", fg="clock_fg")
         clock_label.pack(side="right", padx=10)
 
         def update_clock():
@@ -500,83 +849,145 @@ class Application:
         self.clock_update_id = self.root.after(1000, update_clock) # Initial call
 
         # --- Content Area ---
-        content_area = tk.Frame(main_container, bg=self.current_theme_colors["bg"])
+        content_area = style(tk.Frame(main_container, bg=self.current_theme_colors["bg"]), bg="bg")
         content_area.pack(side="top", fill="both", expand=True)
         content_area.grid_rowconfigure(0, weight=1)
         content_area.grid_columnconfigure(0, weight=1)
 
         # --- Tab Management ---
         tabs = ["Main", "Tweaks", "Optimizations", "Security", "Appearance", "About", "Exit"]
-        tab_labels = {}
-        content_frames = {} # Changed to use theme colors
-
-        def switch_tab(tab_name):
-            if tab_name == "Exit": # Changed comparison to "Exit"
-                self.exit_app()
-                return
-
-            for name, label in tab_labels.items():
-                label.config(bg=self.current_theme_colors["highlight_bg"] if name == tab_name else self.current_theme_colors["bg"], 
-                             fg=self.current_theme_colors["highlight_fg"] if name == tab_name else self.current_theme_colors["fg"])
-            
-            frame = content_frames[tab_name]
-            frame.tkraise()
-            if tab_name == "About":
-                self.show_about_tab()
-                return
-            # Set focus for keyboard navigation (ensure menu exists)
-            if tab_name == "Tweaks" and self.tweaks_menu:
-                self.tweaks_menu.container.focus_set()
-            elif tab_name == "Optimizations" and self.optimizations_menu:
-                self.optimizations_menu.container.focus_set()
-            elif tab_name == "Security" and self.security_menu:
-                self.security_menu.container.focus_set()
-            elif tab_name == "Appearance" and self.appearance_menu:
-                self.appearance_menu.container.focus_set()
+        self.tab_labels = {}
+        self.content_frames = {} # Changed to use theme colors
+        # Tab contents are built the first time switch_tab shows them and kept afterwards.
+        self.tab_builders = {
+            "Main": self._build_main_tab,
+            "Tweaks": self._build_tweaks_tab,
+            "Optimizations": self._build_optimizations_tab,
+            "Security": self._build_security_tab,
+            "Appearance": self._build_appearance_tab,
+            "About": self._build_about_tab,
+        }
+        self.built_tabs = set()
 
         # --- Tab Navigation ---
-        tab_frame = tk.Frame(main_container, bg=self.current_theme_colors["bg"])
+        tab_frame = style(tk.Frame(main_container, bg=self.current_theme_colors["bg"]), bg="bg")
         tab_frame.pack(side="top", fill="x")
 
         for tab_text in tabs:
-            frame = tk.Frame(content_area, bg=self.current_theme_colors["bg"])
+            frame = style(tk.Frame(content_area, bg=self.current_theme_colors["bg"]), bg="bg")
             frame.grid(row=0, column=0, sticky="nsew")
-            content_frames[tab_text] = frame
+            self.content_frames[tab_text] = frame
             tab = tk.Label(
                 tab_frame, text=tab_text, font=self.default_font, fg=self.current_theme_colors["fg"],
                 bg=self.current_theme_colors["bg"], padx=15, pady=8
             )
             tab.pack(side="left")
-            tab.bind("<Button-1>", lambda e, name=tab_text: switch_tab(name))
-            tab_labels[tab_text] = tab
+            tab.bind("<Button-1>", lambda e, name=tab_text: self.switch_tab(name))
+            self.tab_labels[tab_text] = tab
 
-        # --- Populate Main Tab with System Info ---
-        main_frame = content_frames["Main"]
-        try:
-            cpu_info = f"Processor: {platform.processor()}" # Changed text to Processor
-            ram_info = f"Installed Memory (RAM): {psutil.virtual_memory().total / (1024**3):.2f} GB"
-            os_info = f"Operating System: {platform.system()} {platform.release()} ({platform.version()})"
-        except Exception:
-            cpu_info = "Processor: Could not retrieve CPU info."
-            ram_info = "Installed Memory (RAM): Could not retrieve RAM info."
-            os_info = "Operating System: Could not retrieve OS info."
-
-        for i, text in enumerate([os_info, cpu_info, ram_info]):
-            tk.Label( # Changed to use theme colors
+        # The tweak options are plain data, so saving works even if the Tweaks tab was never opened.
+        self.tweaks_options_data = self._create_tweaks_options_data()
+
+        # --- Footer ---
+        footer_frame = style(tk.Frame(main_container, bg=self.current_theme_colors["bg"]), bg="bg")
+        footer_frame.pack(side="bottom", fill="x")
+        footer_label = style(tk.Label(
+            footer_frame, text="<↑/↓> Select | <←/→> Change | <Enter> Toggle Category | F10: Save & Exit | ESC: Exit",
+            font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"], padx=10, pady=3
+        ), bg="bg", fg="fg")
+        footer_label.pack(side="left")
+        self.task_status_label = style(tk.Label(
+            footer_frame, text="", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["value_fg"], padx=10, pady=3
+        ), bg="bg", fg="value_fg")
+        self.task_status_label.pack(side="right")
+        self.root.after(TASK_STATUS_POLL_MS, self.update_task_status)
+
+        # --- Bind Global Keys ---
+        self.root.bind("<F10>", self.save_and_exit)
+        self.root.bind("<Escape>", self.exit_app)
+        # Set initial state
+        self.switch_tab("Main")
+
+    def switch_tab(self, tab_name):
+        """Raises a tab, building its content the first time it is shown."""
+        if tab_name == "Exit": # Changed comparison to "Exit"
+            self.exit_app()
+            return
+
+        self.current_tab = tab_name
+        self._paint_tabs()
+
+        frame = self.content_frames[tab_name]
+        if tab_name not in self.built_tabs:
+            self.built_tabs.add(tab_name)
+            self.tab_builders[tab_name](frame)
+        frame.tkraise()
+        if tab_name == "About":
+            self.show_about_tab()
+            return
+        # Set focus for keyboard navigation (ensure menu exists)
+        if tab_name == "Tweaks" and self.tweaks_menu:
+            self.tweaks_menu.container.focus_set()
+        elif tab_name == "Optimizations" and self.optimizations_menu:
+            self.optimizations_menu.container.focus_set()
+        elif tab_name == "Security" and self.security_menu:
+            self.security_menu.container.focus_set()
+        elif tab_name == "Appearance" and self.appearance_menu:
+            self.appearance_menu.container.focus_set()
+
+    def _build_main_tab(self, main_frame):
+        """Populate Main Tab with System Info.
+
+        The labels show placeholders until a background task has collected
+        the info; WinTweaks caches it, so only the first build waits for it.
+        """
+        info_labels = []
+        for i, text in enumerate(["Operating System: Loading...", "Processor: Loading...", "Installed Memory (RAM): Loading..."]):
+            label = self.styles.register(tk.Label( # Changed to use theme colors
                 main_frame, text=text, font=self.default_font, fg=self.current_theme_colors["fg"],
                 bg=self.current_theme_colors["bg"], justify="left"
-            ).pack(anchor="w", padx=20, pady=5 + i*5)
+            ), bg="bg", fg="fg")
+            label.pack(anchor="w", padx=20, pady=5 + i*5)
+            info_labels.append(label)
 
-        # --- Create About Tab ---
-        about_frame = content_frames["About"]
-        self.about_label = tk.Label(about_frame, text="", font=self.default_font, fg=self.current_theme_colors["fg"], bg=self.current_theme_colors["bg"], justify="left")
-        self.about_label.pack(anchor="center", expand=True)
+        def show(texts):
+            for label, text in zip(info_labels, texts):
+                if label.winfo_exists():
+                    label.config(text=text)
+
+        def on_done(event):
+            info = event['result']
+            show([f"Operating System: {info['os']}",
+                  f"Processor: {info['cpu']}", # Changed text to Processor
+                  f"Installed Memory (RAM): {info['ram_total'] / (1024**3):.2f} GB"])
+
+        def on_error(event):
+            logging.error("Failed to collect system info: %s", event['error'])
+            show(["Operating System: Could not retrieve OS info.",
+                  "Processor: Could not retrieve CPU info.",
+                  "Installed Memory (RAM): Could not retrieve RAM info."])
+
+        def collect(cancel_event):
+            from wintweaks import WinTweaks
+            return WinTweaks.get_system_info()
+
+        self.submit_task("Read System Info", collect, {'done': on_done, 'error': on_error})
+
+        try:
+            from telemetry import TelemetrySampler
+            sampler = TelemetrySampler()
+        except Exception as e:
+            logging.warning("Live telemetry unavailable: %s", e)
+            return
+        self.telemetry_panel = TelemetryPanel(main_frame, sampler, self.default_font, self)
+        self.telemetry_panel.canvas.pack(fill="x", padx=20, pady=15)
 
-        # --- Populate About Tab ---
-        self.show_about_tab()
+    def _build_about_tab(self, about_frame):
+        self.about_label = self.styles.register(tk.Label(about_frame, text="", font=self.default_font, fg=self.current_theme_colors["fg"], bg=self.current_theme_colors["bg"], justify="left"), bg="bg", fg="fg")
+        self.about_label.pack(anchor="center", expand=True)
 
-        # --- Populate Tweaks Tab ---
-        tweaks_frame = content_frames["Tweaks"] # Changed to use theme colors
+    def _create_tweaks_options_data(self):
+        """Returns the tweak catalogue with each option's current value taken from the loaded settings."""
         tweaks_options_data = [ # Changed to use theme colors
 
             {'id': 'cat_explorer', 'type': 'category', 'name': 'File Explorer', 'collapsed': False},
@@ -600,35 +1011,41 @@ class Application:
         for option in tweaks_options_data:
             if option.get('type') == 'option' and option['id'] in self.settings:
                 try:
-                    value_index = option['values'].index(self.settings[option['id']])
+                    value_index = option['values'].index(self.settings.get(option['id']))
                     option['current'] = value_index
                 except (ValueError, KeyError):
                     option['current'] = 0 # Default to first value if saved one is invalid
             elif 'current' not in option:
                  option['current'] = 0 # Default for options not in settings
+        return tweaks_options_data
+
+    def get_current_tweak_settings(self):
+        """Returns ``{option id: selected value}`` for every tweak, whether or not the Tweaks tab was built."""
+        return {data['id']: data['values'][data['current']] for data in self.tweaks_options_data if data['type'] == 'option'}
 
-        self.tweaks_menu = BIOSOptionMenu(tweaks_frame, tweaks_options_data, self.default_font, self) # Changed to use theme colors
+    def _build_tweaks_tab(self, tweaks_frame):
+        self.tweaks_menu = BIOSOptionMenu(tweaks_frame, self.tweaks_options_data, self.default_font, self) # Changed to use theme colors
 
-        # --- Populate Optimizations Tab ---
-        optimizations_frame = content_frames["Optimizations"]
+    def _build_optimizations_tab(self, optimizations_frame):
         optimizations_actions_data = [
 
             {'id': 'clean_temp', 'name': 'Clean Temporary Files', 'callback': self.run_temp_file_cleanup},
+            {'id': 'scan_temp', 'name': 'Scan Temporary Files (Scan only)', 'callback': self.run_temp_file_scan},
+            {'id': 'find_duplicates', 'name': 'Find Duplicate Files', 'callback': self.run_duplicate_search},
             {'id': 'manage_startup', 'name': 'Manage Startup Programs', 'callback': self.show_startup_programs},
-            {'id': 'defrag', 'name': 'Defragment Drives', 'callback': self.show_defrag_window}
+            {'id': 'defrag', 'name': 'Defragment Drives', 'callback': self.show_defrag_window},
+            {'id': 'disk_usage', 'name': 'Disk Usage', 'callback': self.show_disk_usage_window}
         ]
         self.optimizations_menu = BIOSActionMenu(optimizations_frame, optimizations_actions_data, self.default_font, self) # Changed to use theme colors
 
-        # --- Populate Security Tab ---
-        security_frame = content_frames["Security"]
+    def _build_security_tab(self, security_frame):
         security_actions_data = [
             {'id': 'clear_browser', 'name': 'Clear Browser Data (Cache, Cookies, History)', 'callback': self.run_browser_cleanup},
             {'id': 'vuln_scan', 'name': 'Scan for Common Vulnerabilities', 'callback': self.run_vulnerability_scan}
         ]
         self.security_menu = BIOSActionMenu(security_frame, security_actions_data, self.default_font, self) # Changed to use theme colors
 
-        # --- Populate Appearance Tab ---
-        appearance_frame = content_frames["Appearance"]
+    def _build_appearance_tab(self, appearance_frame):
         theme_options_data = [
             {'id': 'theme_select', 'type': 'option', 'name': 'Select Theme', 'values': list(THEMES.keys())},
         ]
@@ -641,21 +1058,6 @@ class Application:
         # Bind theme change to the option menu's change_value method
         self.appearance_menu.change_value = self._on_theme_change # Override to call our handler
 
-        # --- Footer ---
-        footer_frame = tk.Frame(main_container, bg=self.current_theme_colors["bg"])
-        footer_frame.pack(side="bottom", fill="x")
-        footer_label = tk.Label(
-            footer_frame, text="<↑/↓> Select | <←/→> Change | <Enter> Toggle Category | F10: Save & Exit | ESC: Exit",
-            font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"], padx=10, pady=3
-        )
-        footer_label.pack(side="left")
-
-        # --- Bind Global Keys ---
-        self.root.bind("<F10>", self.save_and_exit)
-        self.root.bind("<Escape>", self.exit_app)
-        # Set initial state
-        switch_tab("Main")
-
     def _on_theme_change(self, direction):
         """Handles theme selection changes from the Appearance menu."""
         if not self.appearance_menu or not self.appearance_menu.visible_options: return # Changed to use theme colors
@@ -666,9 +1068,9 @@ class Application:
             num_values = len(option_data['values'])
             option_data['current'] = (option_data['current'] + direction + num_values) % num_values
             new_theme_name = option_data['values'][option_data['current']]
-            self.apply_theme(new_theme_name) # Changed to use theme colors
-            selected_option_info['value_label'].config(text=f"[{new_theme_name}]", fg=self.current_theme_colors["value_fg"])
-            self.recreate_main_app_window_content() # Recreate content to apply new theme
+            selected_option_info['value_label'].config(text=f"[{new_theme_name}]")
+            self.apply_theme(new_theme_name) # Restyles the live widgets in place
+            self.settings.set('theme', new_theme_name) # Cycling through themes ends in a single write
 
     def show_about_tab(self):
         """Populate the About tab with application information."""
@@ -676,124 +1078,562 @@ class Application:
         if self.about_label:
             self.about_label.config(text=about_text, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"]) # Changed to use theme colors
 
-    def recreate_main_app_window_content(self):
-        """Destroys and recreates the main app window to apply theme changes."""
-        if self.main_app_frame:
-            self.main_app_frame.destroy()
-            self.main_app_frame = None
-        
-        self.tweaks_menu = None
-        self.optimizations_menu = None
-        self.appearance_menu = None
-        self.security_menu = None
-        
-        self.create_main_app_window()
-        if self.main_app_frame:
-            self.main_app_frame.pack(fill="both", expand=True)
-
     def save_and_exit(self, event=None):
         """Save settings and exit the application with confirmation."""
         dialog = CustomDialog(self.root, "Save Settings", "Are you sure you want to save settings and exit?", "confirm")
         if dialog.result:
             logging.info("User chose to save and exit.")
-            if self.tweaks_menu:
-                current_settings = self.tweaks_menu.get_current_settings()
+            if self.tweaks_options_data:
+                current_settings = self.get_current_tweak_settings()
                 logging.info("Saving settings: %s", current_settings)
-                
-                # Save to file
-                with open(SETTINGS_FILE, 'w') as f:
-                    json.dump(self.settings, f, indent=4)
-                self.settings['theme'] = self.current_theme_name # Save current theme
+                self.settings.update(dict(current_settings, theme=self.current_theme_name))
+                self.apply_tweaks(current_settings)
 
-                # Apply settings (using the combined settings from self.settings)
-                self.apply_tweaks(current_settings) # Changed current_settings to settings
-            
+            self.tasks.shutdown()
+            self.settings.close() # Writes the saved settings before the process exits
             self.root.destroy()
         
     def exit_app(self, event=None):
         dialog = CustomDialog(self.root, "Exit", "Are you sure you want to exit without saving?", "confirm")
         if dialog.result:
             logging.info("User chose to exit without saving.")
+            self.tasks.shutdown()
+            self.settings.close() # Still persists a pending theme change
             self.root.destroy()
 
+    def submit_task(self, name, fn, handlers, resource=None):
+        """Runs ``fn(cancel_event)`` on the task executor; handlers get its events on the Tk thread.
+
+        Handlers are keyed by event kind, as for ProgressChannel. The channel is
+        closed before the final 'done', 'error' or 'cancelled' handler runs.
+        Returns the Task, or None if a task with the same name is still queued
+        or running.
+        """
+        if self.tasks.find(name):
+            CustomDialog(self.root, "Already Running", f"{name} is already running.", "info")
+            return None
+
+        def closing(handler):
+            def on_final(event):
+                channel.close()
+                if handler:
+                    handler(event)
+            return on_final
+
+        channel_handlers = dict(handlers)
+        for kind in ('done', 'error', 'cancelled'):
+            channel_handlers[kind] = closing(handlers.get(kind))
+        channel = ProgressChannel(self.root, channel_handlers)
+        channel.start()
+        return self.tasks.submit(name, fn, resource, channel.post)
+
+    def update_task_status(self):
+        """Shows the queued and running tasks in the footer; reschedules itself while the label exists."""
+        if not (self.task_status_label and self.task_status_label.winfo_exists()):
+            return
+        parts = []
+        for task in self.tasks.tasks():
+            if task.status == 'queued':
+                parts.append(f"{task.name} (queued)")
+            elif task.progress is not None:
+                parts.append(f"{task.name} {task.progress:.0f}%")
+            else:
+                parts.append(task.name)
+        self.task_status_label.config(text=" | ".join(parts))
+        self.root.after(TASK_STATUS_POLL_MS, self.update_task_status)
+
     def run_temp_file_cleanup(self):
         """Callback function to run the temp file cleaner and show results."""
-        logging.info("Starting temporary file cleanup.")
-
-        self.show_progress_window()
-
-        def cleanup_thread():
-            try:
-                cleaned_mb, errors = WinTweaks.clean_temporary_files(progress_callback=self.update_progress_bar)
-                logging.info("Temporary file cleanup finished. Cleaned: %.2f MB.", cleaned_mb)
-
-                if errors:
-                    logging.warning("%d files could not be deleted.", len(errors))
+        def on_done(event):
+            self.close_progress_window()
+            cleaned_mb, errors = event['result']
+            logging.info("Temporary file cleanup %s. Cleaned: %.2f MB in %d files.", "cancelled" if event['cancelled'] else "finished", cleaned_mb, event['files_done'])
+
+            if errors:
+                logging.warning("%d files could not be deleted (%s).", len(errors), errors.summary())
+                for message in errors:
+                    logging.warning(message)
+
+            title = "Cleanup Cancelled" if event['cancelled'] else "Cleanup Complete"
+            CustomDialog(self.root, title, f"Successfully cleaned {cleaned_mb:.2f} MB of temporary files.\n\nCould not delete {len(errors)} files (they may be in use).")
+
+        def on_error(event):
+            self.close_progress_window()
+            logging.error("Error during temporary file cleanup: %s", event['error'])
+            CustomDialog(self.root, "Error", f"An error occurred during cleanup: {event['error']}", "error")
+
+        def clean(cancel_event):
+            from wintweaks import WinTweaks
+            return WinTweaks.iter_clean_temporary_files(cancel_event)
+
+        task = self.submit_task("Clean Temporary Files", clean, {
+            'progress': self.update_progress_from_event,
+            'done': on_done,
+            'error': on_error,
+            'cancelled': lambda event: self.close_progress_window(),
+        }, resource='disk')
+        if task:
+            logging.info("Starting temporary file cleanup.")
+            self.show_progress_window(task.cancel_event, "Cleaning")
+
+    def run_temp_file_scan(self):
+        """Callback to report reclaimable temp space without deleting anything."""
+        def on_done(event):
+            results = event['result']
+            logging.info("Temporary file scan finished: %s", results)
+            lines = [f"{r['path']}: {r['bytes'] / (1024 * 1024):.2f} MB ({r['files']} files)" for r in results]
+            total_mb = sum(r['bytes'] for r in results) / (1024 * 1024)
+            lines.append(f"\nTotal reclaimable: {total_mb:.2f} MB")
+            CustomDialog(self.root, "Scan Complete", "\n".join(lines), "info")
+
+        def on_error(event):
+            logging.error("Error during temporary file scan: %s", event['error'])
+            CustomDialog(self.root, "Error", f"An error occurred during the scan: {event['error']}", "error")
+
+        def scan(cancel_event):
+            from wintweaks import WinTweaks
+            return WinTweaks.scan_temporary_files()
+
+        if self.submit_task("Scan Temporary Files", scan, {'done': on_done, 'error': on_error}, resource='disk'):
+            logging.info("Starting temporary file scan.")
+
+    def run_duplicate_search(self):
+        """Callback to pick a folder and list the duplicate files found under it."""
+        from tkinter import filedialog
+        search_root = filedialog.askdirectory(parent=self.root, title="Find Duplicate Files In", mustexist=True)
+        if not search_root:
+            return
 
-                CustomDialog(self.root, "Cleanup Complete", f"Successfully cleaned {cleaned_mb:.2f} MB of temporary files.\n\nCould not delete {len(errors)} files (they may be in use).")
-            except Exception as e:
-                logging.error("Error during temporary file cleanup: %s", e)
-                CustomDialog(self.root, "Error", f"An error occurred during cleanup: {e}", "error")
-            finally:
-                self.close_progress_window()
+        def on_progress(event):
+            self.update_progress_from_event(event)
+            if self.progress_window and self.progress_window.winfo_exists():
+                if event['stage'] == 'Scanning':
+                    self.progress_label.config(text=f"Scanning... ({event['files_done']} files)")
+                else:
+                    self.progress_label.config(text=f"{event['stage']}... ({event['progress']:.1f}%)")
+
+        def on_done(event):
+            self.close_progress_window()
+            self.show_duplicate_results(search_root, event['result'], event['cancelled'])
+
+        def on_error(event):
+            self.close_progress_window()
+            logging.error("Error during duplicate file search: %s", event['error'])
+            CustomDialog(self.root, "Error", f"An error occurred during the search: {event['error']}", "error")
+
+        def find(cancel_event):
+            from wintweaks import WinTweaks
+            return WinTweaks.iter_find_duplicate_files([search_root], cancel_event=cancel_event)
+
+        task = self.submit_task("Find Duplicate Files", find, {
+            'progress': on_progress,
+            'done': on_done,
+            'error': on_error,
+            'cancelled': lambda event: self.close_progress_window(),
+        }, resource='disk')
+        if task:
+            logging.info("Starting duplicate file search in %s.", search_root)
+            self.show_progress_window(task.cancel_event, "Searching")
+
+    def show_duplicate_results(self, search_root, search, cancelled):
+        """Lists duplicate groups, most wasted space first."""
+        groups = search['groups']
+        wasted_mb = sum(group['size'] * (len(group['paths']) - 1) for group in groups) / (1024 * 1024)
+        summary = (f"{len(groups)} group(s) of duplicates, {wasted_mb:.2f} MB in extra copies.\n"
+                   f"Read {search['bytes_hashed'] / (1024 * 1024):.0f} MB of {search['bytes_scanned'] / (1024 * 1024):.0f} MB "
+                   f"in {search['files_scanned']} files.")
+        if search['unreadable']:
+            summary += f" {search['unreadable']} file(s) could not be read."
+        if cancelled:
+            summary = "Search cancelled; results are incomplete.\n" + summary
+        if not groups:
+            CustomDialog(self.root, "No Duplicates Found", summary, "info")
+            return
 
-        thread = threading.Thread(target=cleanup_thread)
-        thread.start()
+        window = tk.Toplevel(self.root)
+        window.title(f"Duplicate Files - {search_root}")
+        window.configure(bg=self.current_theme_colors["bg"], highlightbackground=self.current_theme_colors["border"], highlightthickness=1)
+        window.transient(self.root)
+
+        tk.Label(window, text=summary, font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"], justify="left").pack(padx=10, pady=5, anchor="w")
+        list_frame = tk.Frame(window, bg=self.current_theme_colors["bg"])
+        list_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side="right", fill="y")
+        listbox = tk.Listbox(list_frame, font=self.default_font, width=100, height=20, yscrollcommand=scrollbar.set, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"])
+        listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.config(command=listbox.yview)
+
+        rows = []
+        for group in groups[:DUPLICATE_GROUPS_SHOWN]:
+            rows.append(f"{group['size'] / (1024 * 1024):.2f} MB x {len(group['paths'])}")
+            rows.extend(f"    {path}" for path in group['paths'])
+        if len(groups) > DUPLICATE_GROUPS_SHOWN:
+            rows.append(f"... and {len(groups) - DUPLICATE_GROUPS_SHOWN} smaller group(s)")
+        listbox.insert(tk.END, *rows)
+
+        tk.Button(window, text="Close", font=self.default_font, command=window.destroy, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"]).pack(pady=5)
 
     def run_browser_cleanup(self):
-        """Callback to run browser data cleaner and show results."""
-        dialog = CustomDialog(self.root, "Clear Browser Data", "This will attempt to clear cache, cookies, and history for Chrome, Firefox, and Edge. Please ensure your browsers are closed.\n\nContinue?", "confirm")
-        if not dialog.result:
-            return
-        
-        logging.info("Starting browser data cleanup.")
-        cleaned_mb, errors = WinTweaks.clear_browser_data()
-        logging.info("Browser data cleanup finished. Cleaned: %.2f MB.", cleaned_mb)
-        
-        if errors:
-            logging.warning("%d items could not be deleted.", len(errors))
-        
-        CustomDialog(self.root, "Cleanup Complete", f"Successfully cleaned {cleaned_mb:.2f} MB of browser data.\n\nCould not delete {len(errors)} items (they may be in use).", "info")
+        """Callback to measure browser data, confirm with the sizes found, then clear it."""
+        def on_scanned(event):
+            items, summary = event['result']
+            if not items:
+                CustomDialog(self.root, "Clear Browser Data", "No browser cache, cookies or history were found.", "info")
+                return
+            lines = []
+            for browser, categories in sorted(summary.items()):
+                details = ", ".join(f"{category} {size / (1024 * 1024):.1f} MB" for category, size in sorted(categories.items()))
+                lines.append(f"{browser}: {details}")
+            profiles = len({(item['browser'], item['profile']) for item in items})
+            dialog = CustomDialog(self.root, "Clear Browser Data", f"Found in {profiles} profile(s):\n" + "\n".join(lines) + "\n\nPlease ensure your browsers are closed.\n\nContinue?", "confirm")
+            if dialog.result:
+                clear(items)
+
+        def on_done(event):
+            self.close_progress_window()
+            cleaned_mb, errors = event['result']
+            logging.info("Browser data cleanup %s. Cleaned: %.2f MB.", "cancelled" if event['cancelled'] else "finished", cleaned_mb)
+            if errors:
+                logging.warning("%d items could not be deleted (%s).", len(errors), errors.summary())
+                for message in errors:
+                    logging.warning(message)
+
+            title = "Cleanup Cancelled" if event['cancelled'] else "Cleanup Complete"
+            CustomDialog(self.root, title, f"Successfully cleaned {cleaned_mb:.2f} MB of browser data.\n\nCould not delete {len(errors)} items (they may be in use).", "info")
+
+        def on_error(event):
+            self.close_progress_window()
+            logging.error("Error during browser data cleanup: %s", event['error'])
+            CustomDialog(self.root, "Error", f"An error occurred during browser cleanup: {event['error']}", "error")
+
+        def scan(cancel_event):
+            from wintweaks import WinTweaks
+            items = WinTweaks.scan_browser_data(cancel_event)
+            return items, WinTweaks.summarize_browser_data(items)
+
+        def clear(items):
+            def clean(cancel_event):
+                from wintweaks import WinTweaks
+                return WinTweaks.iter_clear_browser_data(items, cancel_event)
+
+            task = self.submit_task("Clear Browser Data", clean, {
+                'progress': self.update_progress_from_event,
+                'done': on_done,
+                'error': on_error,
+                'cancelled': lambda event: self.close_progress_window(),
+            }, resource='disk')
+            if task:
+                logging.info("Starting browser data cleanup of %d locations.", len(items))
+                self.show_progress_window(task.cancel_event, "Clearing browser data")
+
+        if self.submit_task("Scan Browser Data", scan, {'done': on_scanned, 'error': on_error}, resource='disk'):
+            logging.info("Scanning browser data.")
+
+    def show_disk_usage_window(self):
+        """Opens the disk usage view: scan a drive, then drill into its largest directories and files."""
+        from wintweaks import WinTweaks
+        state = {'index': None, 'root': None, 'path': None, 'entries': [], 'task': None, 'largest_files': False}
+
+        window = tk.Toplevel(self.root)
+        window.title("Disk Usage")
+        window.configure(bg=self.current_theme_colors["bg"], highlightbackground=self.current_theme_colors["border"], highlightthickness=1)
+        window.transient(self.root)
+
+        def size_text(num_bytes):
+            for unit in ("B", "KB", "MB", "GB"):
+                if num_bytes < 1024:
+                    return f"{num_bytes:.1f} {unit}"
+                num_bytes /= 1024
+            return f"{num_bytes:.1f} TB"
+
+        def show_entries():
+            index = state['index']
+            if state['largest_files']:
+                state['entries'] = index.largest_files(state['root'])
+                path_label.config(text=f"Largest files on {state['root']}")
+            else:
+                state['entries'] = index.children(state['path'])
+                path_label.config(text=state['path'])
+            listbox.delete(0, tk.END)
+            listbox.insert(tk.END, *[
+                f"{'[DIR]' if entry['is_dir'] else '     '} {size_text(entry['bytes']):>10}  {entry['path'] if state['largest_files'] else entry['name']}"
+                for entry in state['entries']
+            ])
+
+        def open_selected(event=None):
+            selection = listbox.curselection()
+            if not selection or state['index'] is None:
+                return
+            entry = state['entries'][selection[0]]
+            if entry['is_dir']:
+                state['path'], state['largest_files'] = entry['path'], False
+                show_entries()
+
+        def go_up():
+            if state['index'] is None:
+                return
+            if not state['largest_files'] and state['path'] != state['root']:
+                parent = os.path.dirname(state['path'].rstrip("\\/"))
+                state['path'] = state['root'] if len(parent) <= len(state['root'].rstrip("\\/")) else parent
+            state['largest_files'] = False
+            show_entries()
+
+        def toggle_largest_files():
+            if state['index'] is not None:
+                state['largest_files'] = not state['largest_files']
+                show_entries()
+
+        def scan(drive):
+            def on_progress(event):
+                if status_label.winfo_exists():
+                    status_label.config(text=f"Scanning {drive}... {event['files_done']} files, {size_text(event['bytes_done'])}")
+
+            def on_done(event):
+                if not window.winfo_exists():
+                    return
+                index = event['result']
+                root_path = drive + os.sep
+                size, files = index.totals(root_path)
+                state.update(index=index, root=root_path, path=root_path, largest_files=False)
+                status_label.config(text=f"{drive} {size_text(size)} in {files} files" + (" (scan cancelled, sizes are partial)" if event['cancelled'] else ""))
+                show_entries()
+
+            def on_error(event):
+                logging.error("Error during disk usage scan of %s: %s", drive, event['error'])
+                if status_label.winfo_exists():
+                    status_label.config(text=f"Scan of {drive} failed: {event['error']}")
+
+            def scan_drive(cancel_event):
+                from wintweaks import WinTweaks
+                return WinTweaks.iter_scan_disk_usage(drive, cancel_event)
+
+            task = self.submit_task(f"Disk Usage Scan {drive}", scan_drive, {
+                'progress': on_progress, 'done': on_done, 'error': on_error,
+            }, resource='disk')
+            if task:
+                logging.info("Starting disk usage scan of %s.", drive)
+                state['task'] = task
+                status_label.config(text=f"Scanning {drive}...")
+
+        def close():
+            if state['task']:
+                state['task'].cancel()
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+        drive_frame = tk.Frame(window, bg=self.current_theme_colors["bg"])
+        drive_frame.pack(pady=5)
+        drives = WinTweaks.get_local_drives()
+        for drive in drives:
+            tk.Button(drive_frame, text=f"Scan {drive}", font=self.default_font, command=lambda drive=drive: scan(drive),
+                      bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"]).pack(side="left", padx=5)
+        status_label = tk.Label(window, text="Select a drive to scan." if drives else "No local drives found.", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"])
+        status_label.pack(pady=5)
+        path_label = tk.Label(window, text="", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["category_fg"], anchor="w")
+        path_label.pack(fill="x", padx=10)
+
+        list_frame = tk.Frame(window, bg=self.current_theme_colors["bg"])
+        list_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side="right", fill="y")
+        listbox = tk.Listbox(list_frame, font=self.default_font, width=90, height=20, yscrollcommand=scrollbar.set, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"])
+        listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.config(command=listbox.yview)
+        listbox.bind("<Double-Button-1>", open_selected)
+        listbox.bind("<Return>", open_selected)
+        listbox.bind("<BackSpace>", lambda event: go_up())
+
+        button_frame = tk.Frame(window, bg=self.current_theme_colors["bg"])
+        button_frame.pack(pady=5)
+        for text, command in (("Up", go_up), ("Largest Files", toggle_largest_files), ("Close", close)):
+            tk.Button(button_frame, text=text, font=self.default_font, command=command, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"]).pack(side="left", padx=5)
 
     def show_defrag_window(self):
-        """Opens a window to select a drive for defragmentation."""
+        """Opens a window to select the drives to defragment and how many run at once."""
+        from wintweaks import WinTweaks, DEFRAG_MAX_CONCURRENT
         defrag_window = tk.Toplevel(self.root)
         defrag_window.title("Defragment Drives")
         defrag_window.configure(bg=self.current_theme_colors["bg"], highlightbackground=self.current_theme_colors["border"], highlightthickness=1)
         defrag_window.transient(self.root)
         defrag_window.grab_set()
 
-        tk.Label(defrag_window, text="Select a drive to defragment:", font=self.header_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"]).pack(pady=10)
+        tk.Label(defrag_window, text="Select drives to defragment:", font=self.header_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"]).pack(pady=10)
 
         drives = WinTweaks.get_local_drives()
         if not drives:
             tk.Label(defrag_window, text="No local drives found.", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"]).pack(pady=10)
         else:
-            drive_var = tk.StringVar(defrag_window)
-            drive_var.set(drives[0])
-            drive_menu = tk.OptionMenu(defrag_window, drive_var, *drives)
-            drive_menu.config(font=self.default_font, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"], activebackground=self.current_theme_colors["highlight_bg"], activeforeground=self.current_theme_colors["highlight_fg"])
-            drive_menu["menu"].config(font=self.default_font, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"])
-            drive_menu.pack(pady=10)
+            drive_vars = []
+            for i, drive in enumerate(drives):
+                var = tk.BooleanVar(defrag_window, value=(i == 0))
+                tk.Checkbutton(defrag_window, text=drive, variable=var, font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"],
+                               selectcolor=self.current_theme_colors["bg"], activebackground=self.current_theme_colors["highlight_bg"], activeforeground=self.current_theme_colors["highlight_fg"]).pack(anchor="w", padx=20)
+                drive_vars.append((drive, var))
+
+            concurrency_frame = tk.Frame(defrag_window, bg=self.current_theme_colors["bg"])
+            concurrency_frame.pack(pady=10)
+            tk.Label(concurrency_frame, text="Drives at a time:", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"]).pack(side="left")
+            concurrency_var = tk.IntVar(defrag_window, value=min(DEFRAG_MAX_CONCURRENT, len(drives)))
+            tk.Spinbox(concurrency_frame, from_=1, to=len(drives), textvariable=concurrency_var, width=3, font=self.default_font,
+                       bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"]).pack(side="left", padx=5)
 
             def start_defrag():
-                drive = drive_var.get()
-                confirm_dialog = CustomDialog(defrag_window, "Confirm Defragmentation", f"This will run the Windows defragmentation utility on drive {drive}. This can take a long time.\n\nContinue?", "confirm")
+                selected = [drive for drive, var in drive_vars if var.get()]
+                if not selected:
+                    CustomDialog(defrag_window, "No Drive Selected", "Select at least one drive to defragment.", "info")
+                    return
+                try:
+                    max_concurrent = max(1, int(concurrency_var.get()))
+                except (tk.TclError, ValueError):
+                    max_concurrent = DEFRAG_MAX_CONCURRENT
+                confirm_dialog = CustomDialog(defrag_window, "Confirm Defragmentation", f"This will run the Windows defragmentation utility on {', '.join(selected)}. This can take a long time.\n\nContinue?", "confirm")
                 if confirm_dialog.result:
                     defrag_window.destroy() # Close the selection window
-                    CustomDialog(self.root, "Defragmentation Started", f"Defragmentation is running in the background for drive {drive}.\nThis may take a while.", "info")
-                    threading.Thread(target=self.run_defrag_thread, args=(drive,)).start()
-
-            tk.Button(defrag_window, text="Defragment Selected Drive", font=self.default_font, command=start_defrag, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"]).pack(pady=10)
-
-    def run_defrag_thread(self, drive):
-        success, message = WinTweaks.defragment_drive(drive)
-        CustomDialog(self.root, "Defragmentation Complete" if success else "Defragmentation Error", message, "info" if success else "error")
-
-    def run_vulnerability_scan(self):
-        """Callback to run vulnerability scan."""
+                    self.run_defrag(selected, max_concurrent)
+
+            tk.Button(defrag_window, text="Defragment Selected Drives", font=self.default_font, command=start_defrag, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"]).pack(pady=10)
+
+    def run_defrag(self, drives, max_concurrent):
+        """Defragments drives as a background task with one progress bar per drive and a Cancel button."""
+        rows = {}
+
+        def on_drive_progress(event):
+            label, bar = rows[event['drive']]
+            if label.winfo_exists():
+                bar["value"] = event['progress']
+                label.config(text=f"{event['drive']} {event['stage']}: {event['progress']:.0f}%")
+
+        def on_drive_done(event):
+            label, bar = rows[event['drive']]
+            if label.winfo_exists():
+                success = event['result'][0]
+                bar["value"] = 100 if success else bar["value"]
+                label.config(text=f"{event['drive']} {'Cancelled' if event['cancelled'] else 'Done' if success else 'Failed'}")
+
+        def close_window(event=None):
+            if window.winfo_exists():
+                window.destroy()
+
+        def on_done(event):
+            close_window()
+            results = event['result']
+            message = "\n".join(results[drive][1] for drive in drives if drive in results)
+            all_ok = all(success for success, _ in results.values())
+            title = "Defragmentation Cancelled" if event['cancelled'] else "Defragmentation Complete" if all_ok else "Defragmentation Error"
+            CustomDialog(self.root, title, message, "info" if all_ok or event['cancelled'] else "error")
+
+        def on_error(event):
+            close_window()
+            logging.error("Defragmentation failed: %s", event['error'])
+            CustomDialog(self.root, "Defragmentation Error", f"An unexpected error occurred: {event['error']}", "error")
+
+        def defrag(cancel_event):
+            from wintweaks import WinTweaks
+            return WinTweaks.iter_defragment_drives(drives, max_concurrent, cancel_event)
+
+        task = self.submit_task("Defragment Drives", defrag, {
+            'drive_progress': on_drive_progress,
+            'drive_done': on_drive_done,
+            'done': on_done,
+            'error': on_error,
+            'cancelled': close_window,
+        }, resource='disk')
+        if not task:
+            return
+        logging.info("Starting defragmentation of %s, %d at a time.", drives, max_concurrent)
+
+        # Events are handled on later Tk ticks, so the window can be built after submitting.
+        window = tk.Toplevel(self.root)
+        window.title("Defragmentation")
+        window.configure(bg=self.current_theme_colors["bg"], highlightbackground=self.current_theme_colors["border"], highlightthickness=1)
+        window.transient(self.root)
+        window.protocol("WM_DELETE_WINDOW", task.cancel)
+        for drive in drives:
+            label = tk.Label(window, text=f"{drive} Queued", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"], anchor="w", width=40)
+            label.pack(padx=20, pady=(10, 0))
+            bar = ttk.Progressbar(window, mode='determinate', length=360)
+            bar.pack(padx=20, pady=5)
+            rows[drive] = (label, bar)
+
+        def on_cancel():
+            task.cancel()
+            cancel_button.config(state="disabled", text="Cancelling...")
+
+        cancel_button = tk.Button(window, text="Cancel", font=self.default_font, command=on_cancel, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"])
+        cancel_button.pack(pady=10)
+
+    def run_vulnerability_scan(self, use_cache=True):
+        """Runs the security checks as a task and streams each result into a results window.
+
+        Results younger than securitychecks.CHECK_RESULT_TTL are shown from the
+        cache; Rescan runs every check again.
+        """
+        from securitychecks import CHECKS
+        labels = {'ok': "OK", 'issue': "ISSUE", 'error': "ERROR", 'timeout': "TIMEOUT"}
+        rows = {check_id: row for row, check_id in enumerate(CHECKS)}
+
+        def on_check(event):
+            result = event['result']
+            if not listbox.winfo_exists():
+                return
+            text = f"[{labels[result['status']]:^7}] {result['title']}"
+            if result['status'] != 'ok':
+                text += f": {result['issue']}"
+            if result['cached']:
+                text += " (cached)"
+            row = rows[result['check']]
+            listbox.delete(row)
+            listbox.insert(row, text)
+            if result['status'] != 'ok':
+                listbox.itemconfig(row, fg=self.current_theme_colors["category_fg"])
+
+        def on_done(event):
+            findings = [result for result in event['result'] if result['status'] != 'ok']
+            logging.info("Vulnerability scan finished: %d check(s), %d finding(s).", len(event['result']), len(findings))
+            if summary_label.winfo_exists():
+                summary_label.config(text=f"{len(findings)} issue(s) found in {len(event['result'])} check(s)." if findings else "No vulnerabilities detected.")
+                rescan_button.config(state="normal")
+
+        def on_error(event):
+            logging.error("Error during vulnerability scan: %s", event['error'])
+            if window.winfo_exists():
+                window.destroy()
+            CustomDialog(self.root, "Error", f"An error occurred during the scan: {event['error']}", "error")
+
+        def scan(cancel_event):
+            from securitychecks import iter_run_checks
+            return iter_run_checks(cancel_event=cancel_event, use_cache=use_cache)
+
+        task = self.submit_task("Vulnerability Scan", scan, {'check': on_check, 'done': on_done, 'error': on_error})
+        if not task:
+            return
         logging.info("Starting vulnerability scan.")
-        CustomDialog(self.root, "Scan Complete", "Vulnerability scan completed.\n\nNo critical vulnerabilities detected.", "info")
+
+        window = tk.Toplevel(self.root)
+        window.title("Vulnerability Scan")
+        window.configure(bg=self.current_theme_colors["bg"], highlightbackground=self.current_theme_colors["border"], highlightthickness=1)
+        window.transient(self.root)
+
+        def close():
+            task.cancel()
+            window.destroy()
+
+        def rescan():
+            window.destroy()
+            self.run_vulnerability_scan(use_cache=False)
+
+        window.protocol("WM_DELETE_WINDOW", close)
+        listbox = tk.Listbox(window, font=self.default_font, width=90, height=max(len(CHECKS), 3), bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"], selectmode=tk.SINGLE)
+        listbox.pack(fill="both", expand=True, padx=10, pady=10)
+        listbox.insert(tk.END, *[f"[  ...  ] {check.title}" for check in CHECKS.values()])
+        summary_label = tk.Label(window, text="Scanning...", font=self.default_font, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"])
+        summary_label.pack(pady=5)
+        button_frame = tk.Frame(window, bg=self.current_theme_colors["bg"])
+        button_frame.pack(pady=5)
+        rescan_button = tk.Button(button_frame, text="Rescan", font=self.default_font, command=rescan, state="disabled", bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"])
+        rescan_button.pack(side="left", padx=5)
+        tk.Button(button_frame, text="Close", font=self.default_font, command=close, bg=self.current_theme_colors["button_bg"], fg=self.current_theme_colors["button_fg"]).pack(side="left", padx=5)
 
     def show_startup_programs(self):
         """Show window for managing startup programs."""
@@ -815,24 +1655,68 @@ class Application:
         listbox = tk.Listbox(listbox_frame, bg=self.current_theme_colors["bg"], fg=self.current_theme_colors["fg"], selectmode=tk.SINGLE)
         listbox.pack(fill="both", expand=True)
 
+        def row_text(prog):
+            status = "Enabled" if prog['enabled'] else "Disabled"
+            scope = prog['scope'].capitalize()
+            missing = "" if prog['exists'] else " [Missing]"
+            return f"{prog['name']}  [{status}] [{scope}] [{prog['source']}]{missing}"
+
         def populate_list():
-            listbox.delete(0, tk.END) # Changed to use theme colors
-            programs = WinTweaks.get_startup_programs()
-            for prog in sorted(programs, key=lambda x: x['name'].lower()):
-                status = "Enabled" if prog['enabled'] else "Disabled"
-                scope = prog['scope'].capitalize()
-                listbox.insert(tk.END, f"{prog['name']}  [{status}] [{scope}]")
-            startup_window.programs_list = programs # Store for later
+            def on_done(event):
+                if not listbox.winfo_exists():
+                    return
+                listbox.delete(0, tk.END) # Changed to use theme colors
+                # Row i of the listbox always shows programs_list[i]; the list is only re-sorted on refresh.
+                startup_window.programs_list = sorted(event['result'], key=lambda x: x['name'].lower())
+                listbox.insert(tk.END, *[row_text(prog) for prog in startup_window.programs_list])
+
+            def on_error(event):
+                logging.error("Failed to read startup programs: %s", event['error'])
+                if listbox.winfo_exists():
+                    listbox.delete(0, tk.END)
+                    listbox.insert(tk.END, "Could not read startup programs.")
+
+            def load(cancel_event):
+                from wintweaks import WinTweaks
+                return WinTweaks.get_startup_programs()
+
+            if self.submit_task("Read Startup Programs", load, {'done': on_done, 'error': on_error}, resource='registry'):
+                startup_window.programs_list = []
+                listbox.delete(0, tk.END)
+                listbox.insert(tk.END, "Loading...")
 
         def set_state(enabled):
             selection = listbox.curselection()
-            if not selection: return
-            
-            prog_to_change = sorted(startup_window.programs_list, key=lambda x: x['name'].lower())[selection[0]]
-            success, msg = WinTweaks.set_startup_program_state(prog_to_change['name'], prog_to_change['scope'], enabled)
-            if not success:
-                CustomDialog(self.root, "Error", f"Failed to change state: {msg}", "error")
-            populate_list()
+            if not selection or selection[0] >= len(startup_window.programs_list): return
+
+            row = selection[0]
+            prog_to_change = startup_window.programs_list[row]
+            if prog_to_change['enabled'] == enabled: return
+
+            def on_done(event):
+                success, msg = event['result']
+                if not success:
+                    CustomDialog(self.root, "Error", f"Failed to change state: {msg}", "error")
+                    return
+
+                prog_to_change['enabled'] = enabled
+                # Update only the changed row instead of re-reading the registry; a refresh may have re-sorted the list meanwhile.
+                if not listbox.winfo_exists() or prog_to_change not in startup_window.programs_list:
+                    return
+                row = startup_window.programs_list.index(prog_to_change)
+                listbox.delete(row)
+                listbox.insert(row, row_text(prog_to_change))
+                listbox.selection_set(row)
+                listbox.activate(row)
+
+            def on_error(event):
+                CustomDialog(self.root, "Error", f"Failed to change state: {event['error']}", "error")
+
+            def change(cancel_event):
+                from wintweaks import WinTweaks
+                return WinTweaks.set_startup_program_state(prog_to_change['name'], prog_to_change['scope'], enabled, prog_to_change['source'])
+
+            self.submit_task(f"Change Startup Program {prog_to_change['name']}", change, {'done': on_done, 'error': on_error}, resource='registry')
 
         button_frame = tk.Frame(startup_window, bg=self.current_theme_colors["bg"]) # Changed to use theme colors
         button_frame.pack(pady=5)
@@ -844,36 +1728,28 @@ class Application:
         populate_list()
 
     def apply_tweaks(self, settings):
-        """Iterate through settings and apply them using WinTweaks class."""
-        tweak_map = {
-            'show_ext': (WinTweaks.set_file_extensions, settings.get('show_ext') == 'Enabled'),
-            'show_hidden': (WinTweaks.set_hidden_files, settings.get('show_hidden') == 'Enabled'),
-            'dark_mode_win': (WinTweaks.set_windows_theme, settings.get('dark_mode_win') == 'Dark'),
-            'dark_mode_apps': (WinTweaks.set_apps_theme, settings.get('dark_mode_apps') == 'Dark'),
-            'show_full_path': (WinTweaks.set_full_path_in_title, settings.get('show_full_path') == 'Enabled'),
-            'transparency': (WinTweaks.set_transparency_effects, settings.get('transparency') == 'On'),
-            'animated_icons': (WinTweaks.set_animated_icons, settings.get('animated_icons') == 'Enabled'),
-            'blur_effect': (WinTweaks.set_blur_effect, settings.get('blur_effect') == 'Enabled'),
-            'aero_glass': (WinTweaks.set_aero_glass, settings.get('aero_glass') == 'Enabled'),
-            'taskbar_align': (WinTweaks.set_taskbar_alignment, settings.get('taskbar_align') == 'Left'),
-        }
-
-        for key, (func, value) in tweak_map.items():
-            if key in settings:
-                logging.info("Applying tweak '%s' with value '%s'.", key, value)
-                success, message = func(value)
-
-                if not success:
-                    logging.error("Failed to apply tweak '%s': %s", key, message)
-                    CustomDialog(self.root, "Tweak Error", f"Failed to apply '{key}':\n{message}", "error") # Changed to use theme colors
-                if message and "not implemented" in message:
-                    logging.warning("Tweak '%s' is a placeholder and was not applied.", key)
-                    CustomDialog(self.root, "Tweak Info", f"'{key}' is a placeholder and was not applied.", "info") # Changed to use theme colors
+        """Applies the tweak settings through WinTweaks.apply_tweak_settings and reports problems.
+
+        All registry writes are staged on one RegistryTransaction, so each key is
+        read once, only values that differ are written and at most one settings
+        broadcast is sent in the background.
+        """
+        from wintweaks import WinTweaks
+        success, message, results = WinTweaks.apply_tweak_settings(settings)
+        for result in results:
+            if not result['success']:
+                CustomDialog(self.root, "Tweak Error", f"Failed to apply '{result['id']}':\n{result['message']}", "error") # Changed to use theme colors
+            elif result['placeholder']:
+                CustomDialog(self.root, "Tweak Info", f"'{result['id']}' is a placeholder and was not applied.", "info") # Changed to use theme colors
+        if not success:
+            CustomDialog(self.root, "Tweak Error", f"Failed to apply tweaks, no changes were made:\n{message}", "error")
 
 
 if __name__ == "__main__":
 
     # The admin check script can be placed here if not using a manifest
+    startup_timer = StartupTimer.from_environment()
+    startup_timer.record("imports", _PROCESS_START, _IMPORTS_DONE)
     root = tk.Tk()
-    app = Application(root)
+    app = Application(root, startup_timer)
     root.mainloop()
@@ -1,251 +1,1602 @@
-import winreg
-import ctypes
-from ctypes import wintypes
-from typing import List, Tuple, Dict, Any, TypedDict
+from typing import List, Tuple, Dict, Any, Iterator, Optional, TypedDict
 import os
-import psutil
-import shutil
+import stat
+import time
 import tempfile
+import re
+import json
+import mmap
+import hashlib
+import heapq
+import itertools
+import queue
+import shlex
+import sqlite3
 import logging
-import subprocess
- 
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from regbackend import (RegistryBackend, default_backend, HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE,
+                        KEY_QUERY_VALUE, KEY_SET_VALUE, REG_BINARY, REG_DWORD)
+
+# Upper bound on threads used to delete top-level temp entries in parallel.
+CLEANUP_MAX_WORKERS = 8
+# On-disk index of directory sizes used by the dry-run scans (an SQLite database).
+SIZE_INDEX_FILE = os.path.join("data", "size_index.db")
+# How often long-running jobs emit progress events, in seconds.
+PROGRESS_POLL_SECONDS = 0.1
+# Share of the progress fraction driven by bytes; the rest follows file count.
+PROGRESS_BYTE_WEIGHT = 0.5
+
+EXPLORER_ADVANCED_KEY = r"Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced"
+PERSONALIZE_KEY = r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize"
+STARTUP_APPROVED_KEY = r"Software\Microsoft\Windows\CurrentVersion\Explorer\StartupApproved"
+
+# Registry locations programs start from: (scope, source, hive, key path).
+STARTUP_REGISTRY_SOURCES = [
+    ('user', 'Run', HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run"),
+    ('machine', 'Run', HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\Run"),
+    ('machine', 'Run32', HKEY_LOCAL_MACHINE, r"Software\Wow6432Node\Microsoft\Windows\CurrentVersion\Run"),
+    ('user', 'RunOnce', HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\RunOnce"),
+    ('machine', 'RunOnce', HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\RunOnce"),
+]
+# StartupApproved subkey holding the enabled state of each source. RunOnce entries cannot be disabled.
+STARTUP_APPROVED_SUBKEYS = {'Run': 'Run', 'Run32': 'Run32', 'StartupFolder': 'StartupFolder'}
+STARTUP_MAX_WORKERS = 8
+# Seconds resolved startup target metadata is reused while its source is unchanged.
+STARTUP_METADATA_TTL = 300
+# Browsers whose data clear_browser_data removes: (browser, profile kind, env var, profiles directory).
+BROWSER_PROFILE_ROOTS = [
+    ('Google Chrome', 'chromium', 'LOCALAPPDATA', os.path.join('Google', 'Chrome', 'User Data')),
+    ('Microsoft Edge', 'chromium', 'LOCALAPPDATA', os.path.join('Microsoft', 'Edge', 'User Data')),
+    ('Mozilla Firefox', 'firefox', 'APPDATA', os.path.join('Mozilla', 'Firefox', 'Profiles')),
+]
+# Chromium keeps one directory per profile next to shared state (extensions, crash reports, ...).
+CHROMIUM_PROFILE_RE = re.compile(r"^(Default|Profile \d+|Guest Profile)$")
+# The only locations cleared inside a profile: {profile kind: {category: [relative paths]}}.
+BROWSER_DATA_PATHS = {
+    'chromium': {
+        'Cache': ['Cache', 'Code Cache', 'GPUCache'],
+        'Cookies': ['Cookies', os.path.join('Network', 'Cookies')],
+        'History': ['History'],
+    },
+    'firefox': {
+        'Cookies': ['cookies.sqlite'],
+    },
+}
+# Firefox keeps its cache under LOCALAPPDATA, in a directory named after the roaming profile.
+FIREFOX_CACHE_ROOT = ('LOCALAPPDATA', os.path.join('Mozilla', 'Firefox', 'Profiles'))
+FIREFOX_CACHE_DIR = 'cache2'
+# Command used to defragment a drive; the drive letter, /U and /V are appended.
+# Point WCTB_DEFRAG_COMMAND at a stand-in script to exercise the runner off Windows.
+DEFRAG_COMMAND = "defrag.exe"
+DEFRAG_COMMAND_ENV = "WCTB_DEFRAG_COMMAND"
+# Drives defragmented at the same time by iter_defragment_drives unless told otherwise.
+DEFRAG_MAX_CONCURRENT = 2
+# Seconds a cancelled defrag.exe gets to exit after terminate() before it is killed.
+DEFRAG_TERMINATE_TIMEOUT = 10
+# A /U progress line, e.g. "Defragmentation:   45% complete...".
+DEFRAG_PROGRESS_RE = re.compile(r"^\s*(?P<stage>[^:%]+?):?\s+(?P<percent>\d{1,3}(?:\.\d+)?)\s*%")
+# Two-phase deletion: cleanups rename items into a private staging directory and the background purger
+# deletes them; PURGE_STATE_FILE lists the staging directories still to be emptied. On Windows each user
+# stages under PURGE_DIR_NAME at the root of the item's volume, elsewhere in PURGE_POSIX_DIR.
+PURGE_DIR_NAME = "$WCTB_PURGE"
+PURGE_STATE_FILE = os.path.join("data", "purge_dirs.json")
+PURGE_POSIX_DIR = os.path.join("data", "purge")
+PURGE_RETRY_SECONDS = 60
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+# Per-drive DirectorySizeIndex files for the disk usage view, and how many entries it lists.
+DISK_USAGE_INDEX_DIR = os.path.join("data", "disk_usage")
+DISK_USAGE_TOP_K = 25
+DISK_USAGE_MAX_WORKERS = 8
+# Biggest files remembered per directory in a DirectorySizeIndex record.
+INDEX_LARGEST_FILES = DISK_USAGE_TOP_K
+# Duplicate search: files below DUPLICATE_MIN_BYTES are ignored; candidates are first compared by a hash
+# of DUPLICATE_SAMPLE_BYTES from each end. Full hashes read DUPLICATE_READ_BYTES at a time and map files
+# of DUPLICATE_MMAP_MIN_BYTES or more.
+DUPLICATE_MIN_BYTES = 1
+DUPLICATE_SAMPLE_BYTES = 64 * 1024
+DUPLICATE_READ_BYTES = 1024 * 1024
+DUPLICATE_MMAP_MIN_BYTES = 16 * 1024 * 1024
+DUPLICATE_MAX_WORKERS = 4
+# Tweak setting id -> (WinTweaks setter, setting value that turns the tweak on), as saved in settings.json.
+TWEAK_SETTINGS = {
+    'show_ext': ('set_file_extensions', 'Enabled'),
+    'show_hidden': ('set_hidden_files', 'Enabled'),
+    'dark_mode_win': ('set_windows_theme', 'Dark'),
+    'dark_mode_apps': ('set_apps_theme', 'Dark'),
+    'show_full_path': ('set_full_path_in_title', 'Enabled'),
+    'transparency': ('set_transparency_effects', 'On'),
+    'animated_icons': ('set_animated_icons', 'Enabled'),
+    'blur_effect': ('set_blur_effect', 'Enabled'),
+    'aero_glass': ('set_aero_glass', 'Enabled'),
+    'taskbar_align': ('set_taskbar_alignment', 'Left'),
+}
+
+class BrowserDataItem(TypedDict):
+    browser: str     # e.g. 'Google Chrome'
+    profile: str     # profile directory name, e.g. 'Default' or 'Profile 2'
+    category: str    # 'Cache', 'Cookies' or 'History'
+    path: str
+    bytes: int
+    files: int
+
+
 class StartupProgram(TypedDict):
     name: str
-    path: str
-    scope: str
+    path: str        # command line for registry entries, file path for Startup folder entries
+    scope: str       # 'user' or 'machine'
+    source: str      # 'Run', 'Run32', 'RunOnce' or 'StartupFolder'
     enabled: bool
+    target: str      # executable (or shortcut) the entry starts
+    exists: bool
+    size: int
+    mtime: float
+
+
+class DiskUsageEntry(TypedDict):
+    path: str
+    name: str
+    bytes: int     # total size, including everything below a directory
+    files: int
+    is_dir: bool
+
+
+class DuplicateGroup(TypedDict):
+    size: int         # size of each copy in bytes
+    hash: str
+    paths: List[str]  # two or more files with identical content
+
+
+class DuplicateSearch(TypedDict):
+    groups: List[DuplicateGroup]  # most space wasted first
+    files_scanned: int
+    bytes_scanned: int
+    bytes_hashed: int  # bytes read by hashes that completed (sampled ends, then whole files); a small share of bytes_scanned
+    unreadable: int    # candidates that could not be read and were left out
+
+
+class TweakResult(TypedDict):
+    id: str                 # key in TWEAK_SETTINGS
+    value: str              # setting value, e.g. 'Enabled'
+    success: bool
+    message: Optional[str]  # error, or a note such as the placeholder notice
+    placeholder: bool       # the setter reported itself as not implemented
+
+
+class SystemInfo(TypedDict):
+    os: str          # e.g. 'Windows 10 (10.0.19045)'
+    cpu: str         # processor model string
+    ram_total: int   # installed memory in bytes
+
+
+class ProgressEvent(TypedDict, total=False):
+    kind: str           # 'progress' while working, 'done' once with the final result
+    progress: float     # percent complete
+    bytes: int          # bytes freed since the previous event
+    bytes_done: int
+    bytes_total: int    # estimate taken before deletion started
+    files_done: int
+    files_total: int
+    bytes_per_sec: float
+    files_per_sec: float
+    eta: Optional[float]  # seconds remaining, None until there is a rate to go by
+    cancelled: bool     # 'done' only
+    result: Any         # 'done' only: the value the blocking variant returns
+    drive: str          # defragmentation only: drive the event is about
+    stage: str          # defragmentation and duplicate search: current pass, e.g. 'Defragmentation'
+
+
+class WorkCounter:
+    """Thread-safe running total of bytes and files processed by worker threads."""
+
+    def __init__(self, bytes_total: int = 0, files_total: int = 0):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.bytes_total = bytes_total
+        self.files_total = files_total
+        self.bytes_done = 0
+        self.files_done = 0
+        self._last_bytes = 0
+
+    def add(self, size: int, files: int = 1):
+        with self._lock:
+            self.bytes_done += size
+            self.files_done += files
+
+    def event(self) -> ProgressEvent:
+        """Builds a progress event weighted by bytes and file count, with throughput and ETA."""
+        with self._lock:
+            bytes_done, files_done = self.bytes_done, self.files_done
+            delta, self._last_bytes = bytes_done - self._last_bytes, bytes_done
+        # Estimates come from before deletion, so clamp in case the tree grew meanwhile.
+        byte_fraction = min(1.0, bytes_done / self.bytes_total) if self.bytes_total else 1.0
+        file_fraction = min(1.0, files_done / self.files_total) if self.files_total else 1.0
+        fraction = PROGRESS_BYTE_WEIGHT * byte_fraction + (1 - PROGRESS_BYTE_WEIGHT) * file_fraction
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+        return {
+            'kind': 'progress', 'progress': fraction * 100, 'bytes': delta,
+            'bytes_done': bytes_done, 'bytes_total': self.bytes_total,
+            'files_done': files_done, 'files_total': self.files_total,
+            'bytes_per_sec': bytes_done / elapsed, 'files_per_sec': files_done / elapsed, 'eta': eta,
+        }
+
+
+class CleanupErrors:
+    """Bounded, aggregated summary of files that could not be deleted.
+
+    Failures are counted per errno and only the first few paths of each errno
+    are kept as samples, so a cleanup with 100k locked files does not build
+    100k strings. ``len()`` is the total failure count and iterating yields
+    the sample messages, so it can be used wherever a list of error strings was.
+    """
+    MAX_SAMPLES_PER_ERRNO = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.counts: Dict[Any, int] = {}
+        self.samples: Dict[Any, List[str]] = {}
+
+    def add(self, path: str, error: OSError):
+        """Records a failure to delete path."""
+        code = error.errno
+        with self._lock:
+            self.total += 1
+            self.counts[code] = self.counts.get(code, 0) + 1
+            samples = self.samples.setdefault(code, [])
+            if len(samples) < self.MAX_SAMPLES_PER_ERRNO:
+                samples.append(f"Could not delete {path}: {error}")
+
+    def summary(self) -> str:
+        """Returns a one-line summary such as 'errno 13: 120, errno 32: 4'."""
+        return ", ".join(f"errno {code}: {count}" for code, count in sorted(self.counts.items(), key=lambda item: -item[1]))
+
+    def __len__(self):
+        return self.total
+
+    def __iter__(self):
+        for samples in list(self.samples.values()):
+            yield from samples
+
+
+class DirectorySizeIndex:
+    """Persistent, mtime-invalidated index of directory sizes, stored in SQLite.
+
+    Every directory is stored under its normalized path with its original
+    path, its mtime, the bytes and count of the files directly inside it and
+    the names of its subdirectories. A rescan only lists directories whose
+    mtime changed; unchanged directories reuse their stored totals and only
+    their recorded subdirectories are stat'ed. A file that grows in place does
+    not touch its directory's mtime, so sizes are an estimate until that
+    directory changes. Records also keep their INDEX_LARGEST_FILES biggest
+    files, if they have any, and, after a full scan, the aggregated size of
+    everything below them.
+
+    Records are read from the database as they are needed and ``save`` only
+    writes the ones that changed, so the cost of a rescan follows what
+    changed on disk rather than the size of the index.
+    """
+
+    def __init__(self, path: str = SIZE_INDEX_FILE):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._changed: Dict[str, Optional[Dict[str, Any]]] = {}  # Unsaved records; None marks a deletion.
+        self._lock = threading.Lock()  # Guards the connection and _changed.
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            db.execute("CREATE TABLE IF NOT EXISTS dirs (key TEXT PRIMARY KEY, record TEXT NOT NULL) WITHOUT ROWID")
+        except sqlite3.Error:
+            db.close()
+            raise
+        return db
+
+    def load(self):
+        """Opens the index on disk, starting empty if it is missing or unreadable."""
+        directory = os.path.dirname(self.path)
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = self._connect()
+        except (sqlite3.Error, OSError) as e:
+            logging.warning("Size index %s is unreadable, rebuilding: %s", self.path, e)
+            try:
+                os.remove(self.path)
+                self._db = self._connect()
+            except (sqlite3.Error, OSError) as e:
+                logging.warning("Could not rebuild size index %s, it will not be saved: %s", self.path, e)
+                self._db = sqlite3.connect(":memory:", check_same_thread=False)
+                self._db.execute("CREATE TABLE dirs (key TEXT PRIMARY KEY, record TEXT NOT NULL) WITHOUT ROWID")
+        return self
+
+    def save(self):
+        """Writes the records that changed since the last save in one transaction."""
+        with self._lock:
+            if not self._changed or self._db is None:
+                return
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO dirs (key, record) VALUES (?, ?)",
+                                     [(key, json.dumps(record)) for key, record in self._changed.items() if record is not None])
+                self._db.executemany("DELETE FROM dirs WHERE key = ?",
+                                     [(key,) for key, record in self._changed.items() if record is None])
+            self._changed = {}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the record stored under key, None if there is none. Caller holds the lock."""
+        if key in self._changed:
+            return self._changed[key]
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT record FROM dirs WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _records_under(self, root_key: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yields ``(key, record)`` for root_key and every directory below it. Caller holds the lock."""
+        prefix = root_key.rstrip(os.sep) + os.sep
+        # Keys below root sort between prefix and prefix with its separator incremented.
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        if self._db is not None:
+            for key, data in self._db.execute("SELECT key, record FROM dirs WHERE key = ? OR (key >= ? AND key < ?)",
+                                              (root_key, prefix, upper)).fetchall():
+                if key not in self._changed:
+                    yield key, json.loads(data)
+        for key, record in list(self._changed.items()):
+            if record is not None and (key == root_key or key.startswith(prefix)):
+                yield key, record
+
+    def scan(self, root: str, max_workers: int = 1) -> Tuple[int, int]:
+        """Returns ``(bytes, files)`` under root, listing only directories that changed."""
+        result = (0, 0)
+        for event in self.iter_scan(root, max_workers):
+            if event['kind'] == 'done':
+                result = event['result']
+        return result
+
+    def iter_scan(self, root: str, max_workers: int = 1, cancel_event: Optional[threading.Event] = None) -> Iterator[ProgressEvent]:
+        """Scans root like ``scan``, yielding progress events; the 'done' event carries ``(bytes, files)``.
+
+        With max_workers above 1 directories are listed and stat'ed on a
+        thread pool, each one queued as soon as its parent has been visited.
+        Every directory's aggregated ``total`` and ``total_files`` are stored
+        in the index for ``children``. Progress is measured against root's
+        previous total, so it is only a rough guess on the first scan.
+        """
+        root_key = self._key(root)
+        try:
+            mtime = os.stat(root).st_mtime_ns
+        except OSError:
+            yield {'kind': 'done', 'progress': 100.0, 'bytes': 0, 'cancelled': False, 'result': (0, 0)}
+            return
+        with self._lock:
+            previous_total = (self._get(root_key) or {}).get('total', 0)
+
+        records: Dict[str, Dict[str, Any]] = {}
+        children: Dict[str, List[str]] = {}
+        order: List[str] = []  # Parents always come before their children.
+        bytes_done = files_done = 0
+        last_event = time.monotonic()
+        work = deque([(root, root_key, mtime)])
+        pending = set()
+        pool = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+        try:
+            while work or pending:
+                if cancel_event and cancel_event.is_set():
+                    break
+                if pool:
+                    while work:
+                        pending.add(pool.submit(self._visit, *work.popleft()))
+                    done, pending = wait(pending, timeout=PROGRESS_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    visits = [future.result() for future in done]
+                else:
+                    visits = [self._visit(*work.popleft())]
+                for key, record, subdirs in visits:
+                    order.append(key)
+                    records[key] = record
+                    children[key] = [subdir[1] for subdir in subdirs]
+                    bytes_done += record['size']
+                    files_done += record['files']
+                    work.extend(subdirs)
+                if time.monotonic() - last_event >= PROGRESS_POLL_SECONDS:
+                    last_event = time.monotonic()
+                    progress = min(99.0, 100.0 * bytes_done / previous_total) if previous_total else 0.0
+                    yield {'kind': 'progress', 'progress': progress, 'bytes': 0, 'bytes_done': bytes_done, 'files_done': files_done}
+        finally:
+            if pool:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        if cancel_event and cancel_event.is_set():
+            # A partial walk cannot tell removed directories from unvisited ones, so the index keeps both.
+            yield {'kind': 'done', 'progress': 100.0, 'bytes': 0, 'cancelled': True, 'result': (bytes_done, files_done)}
+            return
+
+        totals: Dict[str, Tuple[int, int]] = {}
+        for key in reversed(order):
+            record = records[key]
+            size, files = record['size'], record['files']
+            for child in children[key]:
+                size += totals[child][0]
+                files += totals[child][1]
+            totals[key] = (size, files)
+        with self._lock:
+            for key, (size, files) in totals.items():
+                record = records[key]
+                if record.get('total') != size or record.get('total_files') != files:
+                    record['total'], record['total_files'] = size, files
+                    self._changed[key] = record
+            # Forget directories that no longer exist under root.
+            for key in [key for key, _ in self._records_under(root_key) if key not in totals]:
+                self._changed[key] = None
+        yield {'kind': 'done', 'progress': 100.0, 'bytes': 0, 'cancelled': False, 'result': totals[root_key]}
+
+    def _visit(self, path: str, key: str, mtime: int) -> Tuple[str, Dict[str, Any], List[Tuple[str, str, int]]]:
+        """Returns a directory's record, relisting it if its mtime changed, and its subdirectories to visit."""
+        with self._lock:
+            record = self._get(key)
+        if record is None or record['mtime'] != mtime:
+            record = self._list_dir(path, mtime)
+            with self._lock:
+                self._changed[key] = record
+        elif record.get('path') != path:
+            record['path'] = path  # Same directory, reached under a different case.
+            with self._lock:
+                self._changed[key] = record
+
+        subdirs = []
+        for name in record['dirs']:
+            child = os.path.join(path, name)
+            try:
+                st = os.stat(child, follow_symlinks=False)
+            except OSError:
+                continue
+            if WinTweaks._is_real_dir(st):
+                subdirs.append((child, self._key(child), st.st_mtime_ns))
+        return key, record, subdirs
+
+    @staticmethod
+    def _list_dir(path: str, mtime: int) -> Dict[str, Any]:
+        """Lists one directory and returns its index record."""
+        size = files = 0
+        dirs = []
+        largest: List[Tuple[int, str]] = []  # min-heap of the INDEX_LARGEST_FILES biggest files
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if WinTweaks._is_real_dir(st):
+                        dirs.append(entry.name)
+                    elif not stat.S_ISDIR(st.st_mode):
+                        size += st.st_size
+                        files += 1
+                        if len(largest) < INDEX_LARGEST_FILES:
+                            heapq.heappush(largest, (st.st_size, entry.name))
+                        elif st.st_size > largest[0][0]:
+                            heapq.heapreplace(largest, (st.st_size, entry.name))
+        except OSError as e:
+            logging.warning("Could not scan %s: %s", path, e)
+        record = {'path': path, 'mtime': mtime, 'size': size, 'files': files, 'dirs': dirs}
+        if largest:
+            record['largest'] = [[name, file_size] for file_size, name in sorted(largest, reverse=True)]
+        return record
+
+    def totals(self, path: str) -> Tuple[int, int]:
+        """Returns the aggregated ``(bytes, files)`` under path from the last full scan, ``(0, 0)`` if unknown."""
+        with self._lock:
+            record = self._get(self._key(path)) or {}
+        return record.get('total', 0), record.get('total_files', 0)
+
+    def children(self, path: str, top_k: int = DISK_USAGE_TOP_K) -> List[DiskUsageEntry]:
+        """Returns the largest subdirectories and files directly in path, from the last scan."""
+        with self._lock:
+            record = self._get(self._key(path))
+            if not record:
+                return []
+            entries: List[DiskUsageEntry] = []
+            for name in record['dirs']:
+                child = self._get(self._key(os.path.join(path, name)))
+                if child and 'total' in child:
+                    entries.append({'path': os.path.join(path, name), 'name': name, 'bytes': child['total'],
+                                    'files': child['total_files'], 'is_dir': True})
+        entries += [{'path': os.path.join(path, name), 'name': name, 'bytes': size, 'files': 1, 'is_dir': False}
+                    for name, size in record.get('largest', [])]
+        return heapq.nlargest(top_k, entries, key=lambda entry: entry['bytes'])
+
+    def largest_files(self, root: str, top_k: int = DISK_USAGE_TOP_K) -> List[DiskUsageEntry]:
+        """Returns the largest files anywhere under root, from the last scan.
+
+        Each directory keeps its INDEX_LARGEST_FILES biggest files, so this is
+        exact for top_k up to that many.
+        """
+        heap: List[Tuple[int, str]] = []
+        with self._lock:
+            for key, record in self._records_under(self._key(root)):
+                # Join onto the stored path: the key is normcased and would misname the file on Windows.
+                directory = record.get('path', key)
+                for name, size in record.get('largest', []):
+                    if len(heap) < top_k:
+                        heapq.heappush(heap, (size, os.path.join(directory, name)))
+                    elif size > heap[0][0]:
+                        heapq.heapreplace(heap, (size, os.path.join(directory, name)))
+                    else:
+                        break  # The rest of this directory's list is smaller still.
+        return [{'path': path, 'name': os.path.basename(path), 'bytes': size, 'files': 1, 'is_dir': False}
+                for size, path in sorted(heap, reverse=True)]
+
+
+class BackgroundPurger:
+    """Two-phase deletion: stage now by renaming, delete later on a background thread.
+
+    ``stage`` renames an item into a staging directory on the same volume,
+    which is atomic and O(1), so a cleanup is done as soon as its items are
+    staged: on Windows the current user's directory under the volume's
+    PURGE_DIR_NAME, elsewhere PURGE_POSIX_DIR if the item is on its device.
+    Items on other volumes are not staged. A rename keeps the item's own
+    access rights, and staging directories are private to their user, so
+    staged items are no more visible to other users than they were before.
+    The purger thread then deletes the staging
+    directories' contents at background priority. Staging directories are
+    recorded in PURGE_STATE_FILE, so whatever a crash or exit left behind is
+    deleted the next time the purger starts. Items that cannot be deleted yet
+    (e.g. still open) are retried every PURGE_RETRY_SECONDS.
+    """
+
+    def __init__(self, state_path: str = PURGE_STATE_FILE, posix_dir: str = PURGE_POSIX_DIR):
+        self.state_path = state_path
+        self.posix_dir = os.path.abspath(posix_dir)
+        self._lock = threading.Lock()  # Guards the state and the in-flight counts.
+        self._purge_lock = threading.Lock()  # One purge pass at a time.
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dirs: Optional[List[str]] = None
+        self._private: set = set()  # Staging directories checked to be private in this process.
+        self._in_flight: Dict[str, int] = {}  # Renames under way per staging directory; it is not removed meanwhile.
+        self._names = itertools.count()
+
+    def _staging_dirs(self) -> List[str]:
+        """Returns the recorded staging directories, loading PURGE_STATE_FILE on first use. Caller holds the lock."""
+        if self._dirs is None:
+            try:
+                with open(self.state_path, 'r') as f:
+                    self._dirs = [d for d in json.load(f) if isinstance(d, str) and self._is_own_staging_dir(d)]
+            except FileNotFoundError:
+                self._dirs = []
+            except (json.JSONDecodeError, OSError, TypeError) as e:
+                logging.warning("Purge state %s is unreadable, starting empty: %s", self.state_path, e)
+                self._dirs = []
+        return self._dirs
+
+    def _save(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._dirs, f)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _user_name() -> str:
+        """Names the current user's staging directory on Windows."""
+        import getpass  # Deferred: only staging needs it.
+        return getpass.getuser()
+
+    def _is_own_staging_dir(self, path: str) -> bool:
+        if os.name != 'nt':
+            return path == self.posix_dir
+        return (os.path.basename(path) == self._user_name()
+                and os.path.basename(os.path.dirname(path)) == PURGE_DIR_NAME)
+
+    def staging_dir(self, path: str) -> Optional[str]:
+        """Returns the staging directory for path, e.g. ``C:\\$WCTB_PURGE\\alice``; None if path cannot be staged.
+
+        On POSIX that is posix_dir, and only for paths on the same device.
+        """
+        path = os.path.abspath(path)
+        if os.name != 'nt':
+            try:
+                os.makedirs(os.path.dirname(self.posix_dir), exist_ok=True)
+                same_device = os.stat(path, follow_symlinks=False).st_dev == os.stat(os.path.dirname(self.posix_dir)).st_dev
+            except OSError:
+                return None
+            return self.posix_dir if same_device else None
+        root = os.path.splitdrive(path)[0] + os.sep
+        return os.path.join(root, PURGE_DIR_NAME, self._user_name())
+
+    def _ensure_private_dir(self, staging: str):
+        """Creates staging if needed and makes sure only the current user can get at it.
+
+        Raises OSError if the directory belongs to someone else or cannot be
+        restricted; nothing is staged there then.
+        """
+        if staging in self._private:
+            return
+        os.makedirs(os.path.dirname(staging), exist_ok=True)
+        try:
+            os.mkdir(staging, 0o700)
+        except FileExistsError:
+            pass
+        if os.name == 'nt':
+            # Python ignores the mode on Windows: replace the inherited ACL with full control for this user only.
+            # Items moved in keep their own ACLs.
+            import subprocess  # Deferred: only staging on Windows needs it.
+            import getpass
+            user = f"{os.environ['USERDOMAIN']}\\{getpass.getuser()}" if os.environ.get('USERDOMAIN') else getpass.getuser()
+            result = subprocess.run(['icacls', staging, '/inheritance:r', '/grant:r', f"{user}:(OI)(CI)F"],
+                                    capture_output=True, text=True, stdin=subprocess.DEVNULL,
+                                    creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            if result.returncode != 0:
+                raise PermissionError(f"Could not restrict {staging}: {result.stdout.strip() or result.returncode}")
+        else:
+            st = os.lstat(staging)
+            if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) & 0o077:
+                raise PermissionError(f"{staging} is not a private directory of the current user")
+        self._private.add(staging)
+
+    def stage(self, path: str) -> bool:
+        """Moves path into its staging directory; returns False if it has to be deleted in place instead."""
+        staging = self.staging_dir(path)
+        if staging is None:
+            return False
+        # Never stage anything already inside a staging area (on Windows, any user's).
+        area = os.path.normcase(os.path.dirname(staging) if os.name == 'nt' else staging)
+        target = os.path.normcase(os.path.abspath(path))
+        if target == area or target.startswith(area.rstrip(os.sep) + os.sep):
+            return False
+        with self._lock:
+            dirs = self._staging_dirs()
+            if staging not in dirs:
+                dirs.append(staging)
+                try:
+                    self._save()
+                except OSError as e:
+                    dirs.remove(staging)
+                    logging.debug("Could not record purge directory %s: %s", staging, e)
+                    return False
+            self._in_flight[staging] = self._in_flight.get(staging, 0) + 1
+        try:
+            self._ensure_private_dir(staging)
+            os.rename(path, os.path.join(staging, f"{time.time_ns()}-{next(self._names)}"))
+        except OSError as e:
+            # Typically an open file inside a directory; the caller deletes what it can in place.
+            logging.debug("Could not stage %s for purging: %s", path, e)
+            return False
+        finally:
+            with self._lock:
+                self._in_flight[staging] -= 1
+        self.start()
+        self._wake.set()
+        return True
+
+    def start(self):
+        """Starts the purger thread, which first resumes any purge left over from an earlier run."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="purger", daemon=True)
+            self._thread.start()
+
+    def purge_pending(self) -> int:
+        """Deletes everything staged so far on the calling thread; returns the number of items left behind."""
+        with self._purge_lock:
+            return self._purge_pending()
+
+    def _purge_pending(self) -> int:
+        with self._lock:
+            dirs = list(self._staging_dirs())
+        left = 0
+        for staging in dirs:
+            errors = CleanupErrors()
+            try:
+                with os.scandir(staging) as it:
+                    entries = list(it)
+            except FileNotFoundError:
+                entries = []
+            except OSError as e:
+                logging.warning("Could not list purge directory %s: %s", staging, e)
+                left += 1
+                continue
+            for entry in entries:
+                WinTweaks._remove_path(entry.path, errors, entry=entry)
+            if errors:
+                logging.info("Purge of %s will be retried: %d item(s) could not be deleted (%s).", staging, len(errors), errors.summary())
+            with self._lock:
+                if self._in_flight.get(staging):
+                    continue  # An item is being staged; stage() wakes the purger again.
+                try:
+                    os.rmdir(staging)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    # Not empty: something failed, or new items were staged meanwhile.
+                    if os.path.isdir(staging):
+                        with os.scandir(staging) as it:
+                            left += sum(1 for _ in it)
+                    continue
+                self._staging_dirs().remove(staging)
+                self._private.discard(staging)
+                if os.name == 'nt':
+                    try:
+                        os.rmdir(os.path.dirname(staging))
+                    except OSError:
+                        pass  # Other users' staging directories, or already gone.
+                try:
+                    self._save()
+                except OSError as e:
+                    logging.warning("Could not save purge state %s: %s", self.state_path, e)
+        return left
+
+    @staticmethod
+    def _lower_thread_priority():
+        """Best effort: background CPU and I/O priority for the calling thread."""
+        try:
+            if os.name == 'nt':
+                import ctypes  # Deferred: Windows only.
+                kernel32 = ctypes.windll.kernel32
+                kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+            elif hasattr(os, 'setpriority'):
+                # On Linux a thread id is accepted here and only lowers that thread.
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (OSError, AttributeError) as e:
+            logging.debug("Could not lower purger priority: %s", e)
+
+    def _run(self):
+        self._lower_thread_priority()
+        while True:
+            self._wake.clear()
+            try:
+                left = self.purge_pending()
+            except OSError as e:
+                logging.warning("Background purge failed: %s", e)
+                left = 1
+            # Sleep until more is staged, or retry leftovers later.
+            self._wake.wait(PURGE_RETRY_SECONDS if left else None)
+
+
+class RegistryTransaction:
+    """Batches registry writes and commits them with a single settings broadcast.
+
+    Writes are grouped by key. On commit each key's current values are read
+    once and only values that actually differ are written, so re-applying a
+    profile that is already in place writes nothing and broadcasts nothing.
+    The previous value of everything written is remembered; if a write fails
+    partway, the values already written are restored. A commit that changed
+    something sends one WM_SETTINGCHANGE, off the calling thread.
+    """
+
+    def __init__(self):
+        self._writes: Dict[Tuple[int, str], Dict[str, Tuple[int, Any]]] = {}
+        self.written: List[str] = []
+        self.skipped: List[str] = []
+
+    def set_value(self, hkey: int, key_path: str, name: str, value_type: int, value: Any):
+        """Stages a value to be written on commit; a later write to the same value wins."""
+        self._writes.setdefault((hkey, key_path), {})[name] = (value_type, value)
+
+    def __len__(self):
+        return sum(len(values) for values in self._writes.values())
+
+    @staticmethod
+    def _read_current(hkey: int, key_path: str, names) -> Dict[str, Optional[Tuple[Any, int]]]:
+        """Reads the current ``(value, type)`` of each name, None where it does not exist."""
+        current = {}
+        with WinTweaks.registry.OpenKey(hkey, key_path, 0, KEY_QUERY_VALUE) as key:
+            for name in names:
+                try:
+                    current[name] = WinTweaks.registry.QueryValueEx(key, name)
+                except FileNotFoundError:
+                    current[name] = None
+        return current
+
+    def commit(self, broadcast: bool = True) -> Tuple[bool, Optional[str]]:
+        """Writes all staged values that differ from the registry, rolling back on failure.
+
+        Returns ``(success, error)``. Afterwards ``written`` and ``skipped`` list
+        the values that were changed and the ones already up to date.
+        """
+        written = []  # (hkey, key_path, name, previous (value, type) or None)
+        self.written, self.skipped = [], []
+        current = None
+        try:
+            for (hkey, key_path), values in self._writes.items():
+                current = key_path
+                existing = self._read_current(hkey, key_path, values)
+                changes = {}
+                for name, (value_type, value) in values.items():
+                    if existing[name] == (value, value_type):
+                        self.skipped.append(f"{key_path}\\{name}")
+                    else:
+                        changes[name] = (value_type, value)
+                if not changes:
+                    continue
+                with WinTweaks.registry.OpenKey(hkey, key_path, 0, KEY_SET_VALUE) as key:
+                    for name, (value_type, value) in changes.items():
+                        current = f"{key_path}\\{name}"
+                        WinTweaks.registry.SetValueEx(key, name, 0, value_type, value)
+                        written.append((hkey, key_path, name, existing[name]))
+                        self.written.append(current)
+        except (OSError, TypeError, ValueError, OverflowError) as e:
+            logging.error("Registry write to %s failed, rolling back %d value(s): %s", current, len(written), e)
+            self._rollback(written)
+            self.written = []
+            return False, f"Could not write {current}: {e}"
+        finally:
+            self._writes = {}
+
+        if written:
+            try:
+                WinTweaks.registry.flush()
+            except OSError as e:
+                logging.error("Could not save the registry, rolling back %d value(s): %s", len(written), e)
+                self._rollback(written)
+                self.written = []
+                return False, f"Could not save the registry: {e}"
+        if self.skipped:
+            logging.info("Skipped %d registry value(s) already up to date: %s", len(self.skipped), ", ".join(self.skipped))
+        if written and broadcast:
+            WinTweaks.broadcast_setting_change_async()
+        return True, None
+
+    @staticmethod
+    def _rollback(written):
+        for hkey, key_path, name, previous in reversed(written):
+            try:
+                with WinTweaks.registry.OpenKey(hkey, key_path, 0, KEY_SET_VALUE) as key:
+                    if previous is None:
+                        WinTweaks.registry.DeleteValue(key, name)
+                    else:
+                        WinTweaks.registry.SetValueEx(key, name, 0, previous[1], previous[0])
+            except OSError as e:
+                logging.error("Could not roll back %s\\%s: %s", key_path, name, e)
 
 
 class WinTweaks:
     """Handles applying tweaks to the Windows Registry."""
 
+    _broadcast_lock = threading.Lock()
+    _broadcast_thread: Optional[threading.Thread] = None
+    _broadcast_pending = False
+    _startup_metadata_cache: Dict[Tuple[str, Any], Tuple[float, Dict[str, Any]]] = {}
+    _startup_metadata_lock = threading.Lock()
+    _system_info_cache: Optional[SystemInfo] = None
+    _system_info_lock = threading.Lock()
+
+    # Deletes staged cleanup items in the background; see _discard_path.
+    purger = BackgroundPurger()
+
+    # All registry access goes through this backend; see use_registry.
+    registry: RegistryBackend = default_backend()
+
+    @staticmethod
+    def use_registry(backend: RegistryBackend):
+        """Switches every tweak, startup and security check to another registry backend."""
+        WinTweaks.registry = backend
+
     @staticmethod
     def _broadcast_setting_change():
         """Notifies the system that a setting has changed to force a refresh."""
-        HWND_BROADCAST = 0xFFFF
-        WM_SETTINGCHANGE = 0x001A
-        SMTO_ABORTIFHUNG = 0x0002
-        result = ctypes.c_long()
-        # Using a generic "Environment" string is often effective for Explorer settings.
-        ctypes.windll.user32.SendMessageTimeoutW(HWND_BROADCAST, WM_SETTINGCHANGE, 0, "Environment", SMTO_ABORTIFHUNG, 5000, ctypes.byref(result))
+        WinTweaks.registry.broadcast_setting_change()
+
+    @staticmethod
+    def broadcast_setting_change_async():
+        """Broadcasts WM_SETTINGCHANGE on a background thread.
 
+        Requests made while a broadcast is in flight are coalesced into one
+        follow-up broadcast. The thread is not a daemon so a broadcast started
+        right before exit still completes.
+        """
+        with WinTweaks._broadcast_lock:
+            if WinTweaks._broadcast_thread and WinTweaks._broadcast_thread.is_alive():
+                WinTweaks._broadcast_pending = True
+                return
+            WinTweaks._broadcast_thread = threading.Thread(target=WinTweaks._broadcast_worker, name="wctb-broadcast")
+            WinTweaks._broadcast_thread.start()
 
     @staticmethod
-    def set_file_extensions(show: bool):
-        """Set the HideFileExt value in the registry."""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced", 0, winreg.KEY_SET_VALUE)
-            winreg.SetValueEx(key, "HideFileExt", 0, winreg.REG_DWORD, 0 if show else 1)
-            winreg.CloseKey(key)
-            WinTweaks._broadcast_setting_change()
+    def _broadcast_worker():
+        while True:
+            try:
+                WinTweaks._broadcast_setting_change()
+            except Exception as e:
+                logging.error("WM_SETTINGCHANGE broadcast failed: %s", e)
+            with WinTweaks._broadcast_lock:
+                if not WinTweaks._broadcast_pending:
+                    WinTweaks._broadcast_thread = None
+                    return
+                WinTweaks._broadcast_pending = False
+
+    @staticmethod
+    def _write_dword(txn: Optional[RegistryTransaction], key_path: str, name: str, value: int, description: str):
+        """Stages a HKCU DWORD on txn, or writes and broadcasts it right away if txn is None."""
+        if txn is not None:
+            txn.set_value(HKEY_CURRENT_USER, key_path, name, REG_DWORD, value)
             return True, None
-        except Exception as e:
-            return False, f"Error setting file extension visibility: {e}"
+        txn = RegistryTransaction()
+        txn.set_value(HKEY_CURRENT_USER, key_path, name, REG_DWORD, value)
+        success, error = txn.commit()
+        return success, None if success else f"Error setting {description}: {error}"
+
+
+    @staticmethod
+    def set_file_extensions(show: bool, txn: Optional[RegistryTransaction] = None):
+        """Set the HideFileExt value in the registry."""
+        return WinTweaks._write_dword(txn, EXPLORER_ADVANCED_KEY, "HideFileExt", 0 if show else 1, "file extension visibility")
 
     @staticmethod
-    def set_hidden_files(show: bool):
+    def set_hidden_files(show: bool, txn: Optional[RegistryTransaction] = None):
         """Set the Hidden value in the registry to show or hide hidden files."""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced", 0, winreg.KEY_SET_VALUE)
-            # 1 = Show, 2 = Don't Show
-            winreg.SetValueEx(key, "Hidden", 0, winreg.REG_DWORD, 1 if show else 2) 
-            winreg.CloseKey(key)
-            WinTweaks._broadcast_setting_change()
-            return True, None
-        except Exception as e:
-            return False, f"Error setting hidden files visibility: {e}"
+        # 1 = Show, 2 = Don't Show
+        return WinTweaks._write_dword(txn, EXPLORER_ADVANCED_KEY, "Hidden", 1 if show else 2, "hidden files visibility")
 
     @staticmethod
-    def set_windows_theme(dark: bool):
+    def set_windows_theme(dark: bool, txn: Optional[RegistryTransaction] = None):
         """Set the Windows theme to light or dark."""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize", 0, winreg.KEY_SET_VALUE)
-            # This key controls the theme for the OS itself (taskbar, start menu)
-            winreg.SetValueEx(key, "SystemUsesLightTheme", 0, winreg.REG_DWORD, 0 if dark else 1)
-            winreg.CloseKey(key)
-            WinTweaks._broadcast_setting_change()
-            return True, None
-        except Exception as e:
-            return False, f"Error setting Windows theme: {e}"
+        # This key controls the theme for the OS itself (taskbar, start menu)
+        return WinTweaks._write_dword(txn, PERSONALIZE_KEY, "SystemUsesLightTheme", 0 if dark else 1, "Windows theme")
 
     @staticmethod
-    def set_apps_theme(dark: bool):
+    def set_apps_theme(dark: bool, txn: Optional[RegistryTransaction] = None):
         """Set the Apps theme to light or dark."""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize", 0, winreg.KEY_SET_VALUE)
-            # This key controls the theme for applications (File Explorer, Settings, etc.)
-            winreg.SetValueEx(key, "AppsUseLightTheme", 0, winreg.REG_DWORD, 0 if dark else 1)
-            winreg.CloseKey(key)
-            WinTweaks._broadcast_setting_change()
-            return True, None
-        except Exception as e:
-            return False, f"Error setting Apps theme: {e}"
+        # This key controls the theme for applications (File Explorer, Settings, etc.)
+        return WinTweaks._write_dword(txn, PERSONALIZE_KEY, "AppsUseLightTheme", 0 if dark else 1, "Apps theme")
 
     @staticmethod
-    def set_full_path_in_title(show: bool):
+    def set_full_path_in_title(show: bool, txn: Optional[RegistryTransaction] = None):
         """Show the full path in the File Explorer title bar."""
-        try:
-            # This is a bit tricky as it's in a binary blob.
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Explorer\CabinetState", 0, winreg.KEY_SET_VALUE)
-            # The value is a binary structure, setting it directly is safer than trying to modify parts of it.
-            # A known value for showing full path is b'\x0b\x00\x00\x00\x16\x00\x00\x00\x01\x00\x00\x00\x01\x00\x00\x00'
-            # A known value for hiding it is b'\x0b\x00\x00\x00\x16\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00'
-            # We will just toggle the relevant byte.
-            # For now, we will use a simpler method if available, or note the complexity.
-            # This tweak is complex and risky to implement via simple registry writes. A placeholder is safer.
-            return True, "This tweak is for demonstration and is not implemented."
-        except Exception as e:
-            return False, f"Error setting full path in title: {e}"
+        # This is a bit tricky as it's in a binary blob under Explorer\CabinetState.
+        # A known value for showing full path is b'\x0b\x00\x00\x00\x16\x00\x00\x00\x01\x00\x00\x00\x01\x00\x00\x00'
+        # A known value for hiding it is b'\x0b\x00\x00\x00\x16\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00'
+        # This tweak is complex and risky to implement via simple registry writes. A placeholder is safer.
+        return True, "This tweak is for demonstration and is not implemented."
 
     @staticmethod
-    def set_transparency_effects(enable: bool):
+    def set_transparency_effects(enable: bool, txn: Optional[RegistryTransaction] = None):
         """Enable or disable transparency effects for the UI."""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize", 0, winreg.KEY_SET_VALUE)
-            winreg.SetValueEx(key, "EnableTransparency", 0, winreg.REG_DWORD, 1 if enable else 0)
-            winreg.CloseKey(key)
-            WinTweaks._broadcast_setting_change()
-            return True, None
-        except Exception as e:
-            return False, f"Error setting transparency effects: {e}"
+        return WinTweaks._write_dword(txn, PERSONALIZE_KEY, "EnableTransparency", 1 if enable else 0, "transparency effects")
 
     @staticmethod
-    def set_taskbar_alignment(align_left: bool):
+    def set_taskbar_alignment(align_left: bool, txn: Optional[RegistryTransaction] = None):
         """Set taskbar alignment to Left or Center."""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced", 0, winreg.KEY_SET_VALUE)
-            # 0 = Left, 1 = Center
-            winreg.SetValueEx(key, "TaskbarAl", 0, winreg.REG_DWORD, 0 if align_left else 1)
-            winreg.CloseKey(key)
-            WinTweaks._broadcast_setting_change()
-            return True, None
-        except Exception as e:
-            return False, f"Error setting taskbar alignment: {e}"
+        # 0 = Left, 1 = Center
+        return WinTweaks._write_dword(txn, EXPLORER_ADVANCED_KEY, "TaskbarAl", 0 if align_left else 1, "taskbar alignment")
 
     @staticmethod
-    def set_animated_icons(enable: bool):
+    def set_animated_icons(enable: bool, txn: Optional[RegistryTransaction] = None):
         """Enable or disable animated icons (example, not a real setting)."""
         # Animated icons are not directly supported via a simple registry key.
         return True, "This tweak is a placeholder and does not modify the system."
 
     @staticmethod
-    def set_blur_effect(enable: bool):
+    def set_blur_effect(enable: bool, txn: Optional[RegistryTransaction] = None):
         """Enable or disable blur effect (example, not a real setting)."""
         # Blur effects are not directly supported via a simple registry key.
         return True, "This tweak is a placeholder and does not modify the system."
 
     @staticmethod
-    def set_aero_glass(enable: bool):
+    def set_aero_glass(enable: bool, txn: Optional[RegistryTransaction] = None):
         """Enable or disable Aero Glass (example, not a real setting)."""
         # Aero Glass was a feature of Windows 7/Vista and is not a native toggle in Windows 10/11.
         # Third-party tools are required to achieve this effect.
         return True, "This tweak is a placeholder and does not modify the system."
 
     @staticmethod
-    def clean_temporary_files(progress_callback=None):
-        """Deletes files from user and Windows temp directories, with progress."""
-        temp_dirs = [tempfile.gettempdir(), r"C:\Windows\Temp"]
-        total_deleted_size = 0
-        errors = []
+    def apply_tweak_settings(settings: Dict[str, str], txn: Optional[RegistryTransaction] = None) -> Tuple[bool, Optional[str], List[TweakResult]]:
+        """Applies every TWEAK_SETTINGS entry present in settings as one RegistryTransaction.
+
+        Each key is read once, only values that differ are written and at most
+        one settings broadcast is sent in the background. Pass txn to inspect
+        its ``written`` and ``skipped`` lists afterwards. Returns ``(success,
+        error, results)``; if the commit fails nothing was changed.
+        """
+        txn = txn if txn is not None else RegistryTransaction()
+        results: List[TweakResult] = []
+        for key, (setter, on_value) in TWEAK_SETTINGS.items():
+            if key not in settings:
+                continue
+            value = settings[key] == on_value
+            logging.info("Applying tweak '%s' with value '%s'.", key, value)
+            success, message = getattr(WinTweaks, setter)(value, txn)
+            placeholder = bool(message) and "not implemented" in message
+            if not success:
+                logging.error("Failed to apply tweak '%s': %s", key, message)
+            elif placeholder:
+                logging.warning("Tweak '%s' is a placeholder and was not applied.", key)
+            results.append({'id': key, 'value': settings[key], 'success': success, 'message': message, 'placeholder': placeholder})
+
+        success, error = txn.commit()
+        if success:
+            logging.info("Tweaks applied: %d value(s) changed, %d already up to date.", len(txn.written), len(txn.skipped))
+        else:
+            logging.error("Failed to apply tweaks, changes were rolled back: %s", error)
+        return success, error, results
+
+    @staticmethod
+    def _unlink(path: str):
+        """Deletes a file, clearing the read-only attribute and retrying once if needed."""
+        try:
+            os.unlink(path)
+        except PermissionError:
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
 
-        for directory in temp_dirs:
-            if not os.path.exists(directory):
+    @staticmethod
+    def _is_real_dir(st: os.stat_result) -> bool:
+        """True for directories that should be descended into (not links or junctions)."""
+        if not stat.S_ISDIR(st.st_mode):
+            return False
+        # Junctions and directory symlinks are reparse points; remove the link, not the target.
+        return not (getattr(st, 'st_file_attributes', 0) & getattr(stat, 'FILE_ATTRIBUTE_REPARSE_POINT', 0))
+
+    @staticmethod
+    def _remove_tree(path: str, errors: CleanupErrors, counter: Optional[WorkCounter] = None, cancel_event: Optional[threading.Event] = None) -> int:
+        """Deletes a directory tree in a single scandir pass and returns the bytes freed.
+
+        File sizes are taken from the same DirEntry stat used to decide how to
+        delete the entry, so the tree is never walked twice.
+        """
+        freed = 0
+        dirs = [path]
+        stack = [path]
+        while stack:
+            if cancel_event and cancel_event.is_set():
+                break
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError as e:
+                errors.add(current, e)
                 continue
-            
-            items = os.listdir(directory)
-            total_items = len(items)
-            
-            for i, item in enumerate(items):
-                path = os.path.join(directory, item)
+            for entry in entries:
                 try:
-                    file_size = 0
-                    if os.path.isfile(path) or os.path.islink(path):
-                        file_size = os.path.getsize(path)
-                        os.unlink(path)
-                        total_deleted_size += file_size
-                    elif os.path.isdir(path):
-                        dir_size = 0
-                        for dirpath, _, filenames in os.walk(path):
-                            for f in filenames:
-                                fp = os.path.join(dirpath, f)
-                                dir_size += os.path.getsize(fp)
-                        
-                        file_size = dir_size
-                        shutil.rmtree(path)
-                        total_deleted_size += dir_size
-
-                except (PermissionError, OSError) as e:
-                    errors.append(f"Could not delete {path}: {e}")
-                
-                if progress_callback:
-                    progress = (i + 1) / total_items * 100
-                    progress_callback(progress, file_size)
-        
-        cleaned_mb = total_deleted_size / (1024 * 1024)
-        return cleaned_mb, errors
+                    st = entry.stat(follow_symlinks=False)
+                    if WinTweaks._is_real_dir(st):
+                        dirs.append(entry.path)
+                        stack.append(entry.path)
+                    elif stat.S_ISDIR(st.st_mode):
+                        os.rmdir(entry.path)
+                    else:
+                        WinTweaks._unlink(entry.path)
+                        freed += st.st_size
+                        if counter:
+                            counter.add(st.st_size)
+                except OSError as e:
+                    errors.add(entry.path, e)
+
+        if cancel_event and cancel_event.is_set():
+            # Partially emptied directories are left in place rather than reported as failures.
+            return freed
+        # Children were discovered after their parents, so removing in reverse empties them first.
+        for directory in reversed(dirs):
+            try:
+                os.rmdir(directory)
+            except OSError as e:
+                errors.add(directory, e)
+        return freed
 
     @staticmethod
-    def get_startup_programs() -> List[StartupProgram]:
-        """Gets a list of startup programs and their enabled/disabled status from HKCU and HKLM."""
-        startup_items = []
-        scopes = {
-            'user': winreg.HKEY_CURRENT_USER,
-            'machine': winreg.HKEY_LOCAL_MACHINE
-        }
+    def _remove_path(path: str, errors: CleanupErrors, counter: Optional[WorkCounter] = None, cancel_event: Optional[threading.Event] = None,
+                     entry: Optional[os.DirEntry] = None) -> int:
+        """Deletes a file, link or directory tree and returns the bytes freed; uses the DirEntry's cached stat if given."""
+        try:
+            st = entry.stat(follow_symlinks=False) if entry else os.stat(path, follow_symlinks=False)
+            if WinTweaks._is_real_dir(st):
+                return WinTweaks._remove_tree(path, errors, counter, cancel_event)
+            if stat.S_ISDIR(st.st_mode):
+                os.rmdir(path)
+                return 0
+            WinTweaks._unlink(path)
+            if counter:
+                counter.add(st.st_size)
+            return st.st_size
+        except OSError as e:
+            errors.add(path, e)
+            return 0
+
+    @staticmethod
+    def _discard_path(path: str, size: int, files: int, errors: CleanupErrors, counter: Optional[WorkCounter] = None,
+                      cancel_event: Optional[threading.Event] = None, entry: Optional[os.DirEntry] = None) -> int:
+        """Stages path with the background purger, or deletes it in place if it cannot be moved; returns the bytes freed.
 
-        for scope_name, hkey in scopes.items():
-            run_key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
-            approved_key_path = r"Software\Microsoft\Windows\CurrentVersion\Explorer\StartupApproved\Run"
+        A staged item counts as freed at once, using the ``size`` and ``files``
+        estimate, since the purger is certain to delete it.
+        """
+        if cancel_event and cancel_event.is_set():
+            return 0
+        if WinTweaks.purger.stage(path):
+            if counter:
+                counter.add(size, files)
+            return size
+        return WinTweaks._remove_path(path, errors, counter, cancel_event, entry)
 
+    @staticmethod
+    def _measure_path(path: str) -> Tuple[int, int]:
+        """Returns ``(bytes, files)`` under a file or directory, in one scandir pass without following links."""
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return 0, 0
+        if not WinTweaks._is_real_dir(st):
+            return st.st_size, 1
+        size = files = 0
+        stack = [path]
+        while stack:
             try:
-                with winreg.OpenKey(hkey, run_key_path) as run_key:
-                    i = 0
-                    while True:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
                         try:
-                            name, path, _ = winreg.EnumValue(run_key, i)
-                            startup_items.append({'name': name, 'path': path, 'scope': scope_name, 'enabled': True})
-                            i += 1
+                            st = entry.stat(follow_symlinks=False)
                         except OSError:
-                            break
-            except FileNotFoundError:
-                logging.warning("Startup 'Run' key not found for %s.", scope_name)
-            
+                            continue
+                        if WinTweaks._is_real_dir(st):
+                            stack.append(entry.path)
+                        elif not stat.S_ISDIR(st.st_mode):
+                            size += st.st_size
+                            files += 1
+            except OSError:
+                continue
+        return size, files
+
+    @staticmethod
+    def get_temp_directories() -> List[str]:
+        """Returns the temp directories targeted by the cleanup."""
+        return [tempfile.gettempdir(), r"C:\Windows\Temp"]
+
+    @staticmethod
+    def scan_temporary_files(index_path: str = SIZE_INDEX_FILE) -> List[Dict[str, Any]]:
+        """Reports reclaimable bytes per temp directory without deleting anything.
+
+        Sizes come from a persistent DirectorySizeIndex, so repeated scans only
+        descend into directories whose mtime changed.
+        """
+        index = DirectorySizeIndex(index_path).load()
+        results = []
+        for directory in WinTweaks.get_temp_directories():
+            if not os.path.isdir(directory):
+                continue
+            size, files = index.scan(directory)
+            results.append({'path': directory, 'bytes': size, 'files': files})
+        try:
+            index.save()
+        except (OSError, sqlite3.Error) as e:
+            logging.warning("Could not save size index %s: %s", index_path, e)
+        index.close()
+        return results
+
+    @staticmethod
+    def iter_clean_temporary_files(cancel_event: Optional[threading.Event] = None, index_path: str = SIZE_INDEX_FILE) -> Iterator[ProgressEvent]:
+        """Deletes files from user and Windows temp directories, yielding progress events.
+
+        The total is estimated up front from the DirectorySizeIndex so progress
+        is weighted by bytes and file count rather than by top-level entries.
+        Top-level entries are handed to the background purger, so the cleanup
+        is done once they are renamed out of the way; entries that cannot be
+        moved (usually because something in them is open) are deleted in place
+        on a bounded thread pool. Setting cancel_event stops the cleanup after
+        the directories currently being listed. The last event
+        has kind 'done' and carries ``(cleaned_mb, errors)`` where errors is a
+        CleanupErrors summary.
+        """
+        total_deleted_size = 0
+        errors = CleanupErrors()
+
+        index = DirectorySizeIndex(index_path).load()
+        bytes_total = files_total = 0
+        entries = []
+        for directory in WinTweaks.get_temp_directories():
             try:
-                with winreg.OpenKey(hkey, approved_key_path) as approved_key:
-                    i = 0
-                    while True:
-                        try:
-                            name, value, _ = winreg.EnumValue(approved_key, i)
-                            # Find the corresponding item and update its status
-                            for item in startup_items:
-                                if item['name'] == name and item['scope'] == scope_name:
-                                    # Value starting with 0x02 means disabled
-                                    if value and value.startswith(b'\x02'):
-                                        item['enabled'] = False
-                                    break
-                            i += 1
-                        except OSError:
-                            break
+                with os.scandir(directory) as it:
+                    entries.extend(entry for entry in it if entry.name != PURGE_DIR_NAME)
             except FileNotFoundError:
-                logging.info("Startup 'StartupApproved' key not found for %s. All items assumed enabled.", scope_name)
+                continue
+            except OSError as e:
+                errors.add(directory, e)
+                continue
+            size, files = index.scan(directory)
+            bytes_total += size
+            files_total += files
+        try:
+            index.save()
+        except (OSError, sqlite3.Error) as e:
+            logging.warning("Could not save size index %s: %s", index_path, e)
+
+        counter = WorkCounter(bytes_total, files_total)
+
+        def discard(entry: os.DirEntry) -> int:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError as e:
+                errors.add(entry.path, e)
+                return 0
+            size, files = index.totals(entry.path) if WinTweaks._is_real_dir(st) else (st.st_size, 1)
+            return WinTweaks._discard_path(entry.path, size, files, errors, counter, cancel_event, entry)
+
+        with ThreadPoolExecutor(max_workers=CLEANUP_MAX_WORKERS) as pool:
+            pending = {pool.submit(discard, entry) for entry in entries}
+            while pending:
+                done, pending = wait(pending, timeout=PROGRESS_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if not future.cancelled():
+                        total_deleted_size += future.result()
+                if cancel_event and cancel_event.is_set():
+                    for future in pending:
+                        future.cancel()
+                yield counter.event()
 
+        index.close()
+        cleaned_mb = total_deleted_size / (1024 * 1024)
+        done_event = counter.event()
+        done_event.update(kind='done', cancelled=bool(cancel_event and cancel_event.is_set()), result=(cleaned_mb, errors))
+        yield done_event
+
+    @staticmethod
+    def _run_with_callback(events: Iterator[ProgressEvent], progress_callback=None):
+        """Drains a progress event generator, forwarding progress to a callback, and returns its result."""
+        result = None
+        for event in events:
+            if event['kind'] == 'done':
+                result = event['result']
+            elif progress_callback:
+                progress_callback(event['progress'], event.get('bytes', 0))
+        return result
+
+    @staticmethod
+    def clean_temporary_files(progress_callback=None):
+        """Deletes files from user and Windows temp directories, with progress.
+
+        Blocking wrapper around iter_clean_temporary_files; returns ``(cleaned_mb, errors)``.
+        """
+        return WinTweaks._run_with_callback(WinTweaks.iter_clean_temporary_files(), progress_callback)
+
+    @staticmethod
+    def _hash_file(path: str, size: int, partial: bool, cancel_event: Optional[threading.Event] = None) -> Optional[str]:
+        """Returns a digest of the file's first and last DUPLICATE_SAMPLE_BYTES, or of all of it.
+
+        Full hashes of large files go through mmap so the data is hashed
+        without being copied; others are read into one reusable buffer.
+        Returns None if cancel_event is set partway through.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            if partial:
+                digest.update(f.read(DUPLICATE_SAMPLE_BYTES))
+                if size > 2 * DUPLICATE_SAMPLE_BYTES:
+                    f.seek(size - DUPLICATE_SAMPLE_BYTES)
+                digest.update(f.read(DUPLICATE_SAMPLE_BYTES))
+                return digest.hexdigest()
+            if size >= DUPLICATE_MMAP_MIN_BYTES:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, len(view), DUPLICATE_READ_BYTES):
+                            if cancel_event and cancel_event.is_set():
+                                return None
+                            digest.update(view[offset:offset + DUPLICATE_READ_BYTES])
+                    finally:
+                        view.release()
+            else:
+                buffer = bytearray(DUPLICATE_READ_BYTES)
+                view = memoryview(buffer)
+                while True:
+                    if cancel_event and cancel_event.is_set():
+                        return None
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    digest.update(view[:read])
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_stage(stage: str, files: List[Tuple[str, int]], partial: bool, cancel_event: Optional[threading.Event],
+                    unreadable: List[str]) -> Iterator[ProgressEvent]:
+        """Hashes files on a worker pool, yielding progress; the generator returns ``(bytes hashed, {path: digest})``.
+
+        At most a few jobs per worker are in flight, so millions of candidates
+        do not become millions of pending futures. Files that could not be
+        hashed, or whose hash was cancelled, count as done but add no bytes.
+        """
+        sample = 2 * DUPLICATE_SAMPLE_BYTES
+        counter = WorkCounter(sum(min(size, sample) if partial else size for _, size in files), len(files))
+        digests: Dict[str, str] = {}
+        queue_limit = DUPLICATE_MAX_WORKERS * 4
+        jobs = iter(files)
+        with ThreadPoolExecutor(max_workers=DUPLICATE_MAX_WORKERS) as pool:
+            pending = {}
+            while True:
+                while len(pending) < queue_limit and not (cancel_event and cancel_event.is_set()):
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    pending[pool.submit(WinTweaks._hash_file, job[0], job[1], partial, cancel_event)] = job
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=PROGRESS_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, size = pending.pop(future)
+                    try:
+                        digest = future.result()
+                    except (OSError, ValueError) as e:  # ValueError: mmap of a file truncated since the scan
+                        logging.debug("Could not hash %s: %s", path, e)
+                        unreadable.append(path)
+                        digest = None
+                    if digest:
+                        digests[path] = digest
+                        counter.add(min(size, sample) if partial else size)
+                    else:
+                        counter.add(0)
+                event = counter.event()
+                event['stage'] = stage
+                yield event
+        return counter.bytes_done, digests
+
+    @staticmethod
+    def iter_find_duplicate_files(roots: List[str], min_size: int = DUPLICATE_MIN_BYTES,
+                                  cancel_event: Optional[threading.Event] = None) -> Iterator[ProgressEvent]:
+        """Finds files with identical content under roots, yielding progress events.
+
+        Files are bucketed by size first, which needs only the directory
+        listing; only sizes shared by several files go on to be hashed. Those
+        are narrowed by a hash of their first and last DUPLICATE_SAMPLE_BYTES,
+        and only files that still collide are hashed in full, so most bytes on
+        a volume are never read. Files no larger than the two samples are fully
+        covered by the first hash. Hard links are collapsed to one path per
+        file before any hashing, so each file is read at most once per stage.
+        ``bytes_hashed`` is what the completed hashes read: a full hash rereads
+        the ends sampled before. Events carry the current ``stage``; the last
+        event has kind 'done' and carries a DuplicateSearch.
+        """
+        by_size: Dict[int, List[Tuple[str, int, int]]] = {}  # size -> (path, st_dev, st_ino)
+        files_scanned = bytes_scanned = 0
+        unreadable: List[str] = []
+        last_event = time.monotonic()
+        stack = list(roots)
+        while stack and not (cancel_event and cancel_event.is_set()):
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError as e:
+                logging.debug("Could not list %s: %s", current, e)
+                continue
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if WinTweaks._is_real_dir(st):
+                    stack.append(entry.path)
+                elif stat.S_ISREG(st.st_mode):
+                    files_scanned += 1
+                    bytes_scanned += st.st_size
+                    if st.st_size >= min_size:
+                        by_size.setdefault(st.st_size, []).append((entry.path, st.st_dev, st.st_ino))
+            if time.monotonic() - last_event >= PROGRESS_POLL_SECONDS:
+                last_event = time.monotonic()
+                yield {'kind': 'progress', 'stage': 'Scanning', 'progress': 0.0, 'bytes': 0, 'files_done': files_scanned}
+
+        candidates: List[Tuple[str, int]] = []
+        for size, files in by_size.items():
+            if len(files) > 1:
+                distinct = WinTweaks._distinct_files(files)
+                if len(distinct) > 1:
+                    candidates.extend((path, size) for path in distinct)
+        bytes_hashed, partial_digests = yield from WinTweaks._hash_stage('Comparing file ends', candidates, True, cancel_event, unreadable)
+
+        groups: Dict[Tuple[int, str], List[str]] = {}
+        for path, size in candidates:
+            if path in partial_digests:
+                groups.setdefault((size, partial_digests[path]), []).append(path)
+        survivors = [(path, size) for (size, _), paths in groups.items() if len(paths) > 1 and size > 2 * DUPLICATE_SAMPLE_BYTES for path in paths]
+        full_bytes, full_digests = yield from WinTweaks._hash_stage('Hashing', survivors, False, cancel_event, unreadable)
+        bytes_hashed += full_bytes
+
+        duplicates: List[DuplicateGroup] = []
+        for (size, partial_digest), paths in groups.items():
+            if size > 2 * DUPLICATE_SAMPLE_BYTES:
+                by_digest: Dict[str, List[str]] = {}
+                for path in paths:
+                    if path in full_digests:
+                        by_digest.setdefault(full_digests[path], []).append(path)
+            else:
+                by_digest = {partial_digest: paths}
+            for digest, same in by_digest.items():
+                if len(same) > 1:
+                    duplicates.append({'size': size, 'hash': digest, 'paths': sorted(same)})
+        duplicates.sort(key=lambda group: group['size'] * (len(group['paths']) - 1), reverse=True)
+
+        logging.info("Duplicate search: %d file(s), %d byte(s) scanned, %d byte(s) hashed, %d group(s).",
+                     files_scanned, bytes_scanned, bytes_hashed, len(duplicates))
+        yield {'kind': 'done', 'progress': 100.0, 'bytes': 0, 'cancelled': bool(cancel_event and cancel_event.is_set()),
+               'result': {'groups': duplicates, 'files_scanned': files_scanned, 'bytes_scanned': bytes_scanned,
+                          'bytes_hashed': bytes_hashed, 'unreadable': len(unreadable)}}
+
+    @staticmethod
+    def _distinct_files(files: List[Tuple[str, int, int]]) -> List[str]:
+        """Returns one path per file from ``(path, st_dev, st_ino)``, dropping hard links to a file already seen."""
+        seen = set()
+        distinct = []
+        for path, dev, ino in files:
+            if not ino:
+                # DirEntry stats on Windows leave st_ino at 0; a full stat has the file ID.
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                dev, ino = st.st_dev, st.st_ino
+            key = (dev, ino) if ino else path
+            if key not in seen:
+                seen.add(key)
+                distinct.append(path)
+        return distinct
+
+    @staticmethod
+    def find_duplicate_files(roots: List[str], progress_callback=None) -> "DuplicateSearch":
+        """Blocking wrapper around iter_find_duplicate_files; returns its DuplicateSearch."""
+        return WinTweaks._run_with_callback(WinTweaks.iter_find_duplicate_files(roots), progress_callback)
+
+    @staticmethod
+    def get_startup_folders() -> List[Tuple[str, str]]:
+        """Returns ``(scope, path)`` for the per-user and common Startup folders."""
+        startup = os.path.join('Microsoft', 'Windows', 'Start Menu', 'Programs', 'Startup')
+        return [
+            ('user', os.path.join(os.getenv('APPDATA', ''), startup)),
+            ('machine', os.path.join(os.getenv('ProgramData', r"C:\ProgramData"), startup)),
+        ]
+
+    @staticmethod
+    def _read_startup_registry_source(scope: str, source: str, hkey: int, key_path: str) -> List[Tuple[StartupProgram, Any]]:
+        """Reads one Run-style key; each entry is paired with the key's last-write time."""
+        items = []
+        try:
+            with WinTweaks.registry.OpenKey(hkey, key_path) as run_key:
+                last_write = WinTweaks.registry.QueryInfoKey(run_key)[2]
+                i = 0
+                while True:
+                    try:
+                        name, path, _ = WinTweaks.registry.EnumValue(run_key, i)
+                    except OSError:
+                        break
+                    items.append(({'name': name, 'path': path, 'scope': scope, 'source': source, 'enabled': True}, last_write))
+                    i += 1
+        except FileNotFoundError:
+            logging.info("Startup '%s' key not found for %s.", source, scope)
+        return items
+
+    @staticmethod
+    def _read_startup_folder(scope: str, folder: str) -> List[Tuple[StartupProgram, Any]]:
+        """Lists a Startup folder; each entry is paired with its own mtime."""
+        items = []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name.lower() == 'desktop.ini' or not entry.is_file():
+                        continue
+                    items.append(({'name': entry.name, 'path': entry.path, 'scope': scope, 'source': 'StartupFolder', 'enabled': True}, entry.stat().st_mtime))
+        except OSError:
+            logging.info("Startup folder not found for %s: %s", scope, folder)
+        return items
+
+    @staticmethod
+    def _read_startup_approved(hkey: int, subkey: str) -> Dict[str, bytes]:
+        """Reads a StartupApproved subkey as ``{lower-case name: value}``."""
+        approved = {}
+        try:
+            with WinTweaks.registry.OpenKey(hkey, f"{STARTUP_APPROVED_KEY}\\{subkey}") as approved_key:
+                i = 0
+                while True:
+                    try:
+                        name, value, _ = WinTweaks.registry.EnumValue(approved_key, i)
+                    except OSError:
+                        break
+                    approved[name.lower()] = value
+                    i += 1
+        except FileNotFoundError:
+            pass
+        return approved
+
+    @staticmethod
+    def _resolve_startup_target(command: str) -> str:
+        """Extracts the executable path from a Run command line."""
+        command = os.path.expandvars(command.strip())
+        if command.startswith('"'):
+            return command[1:].split('"', 1)[0]
+        # Unquoted paths may contain spaces; take the shortest prefix that ends in an executable.
+        lowered = command.lower()
+        for ext in ('.exe', '.com', '.bat', '.cmd', '.lnk'):
+            end = lowered.find(ext)
+            if end != -1:
+                return command[:end + len(ext)]
+        return command.split(' ', 1)[0]
+
+    @staticmethod
+    def _startup_metadata(item: StartupProgram, source_mtime: Any) -> Dict[str, Any]:
+        """Resolves and stats an entry's target, cached by path and source mtime.
+
+        Startup folder shortcuts are reported as the shortcut file itself.
+        """
+        cache_key = (item['path'], source_mtime)
+        now = time.monotonic()
+        with WinTweaks._startup_metadata_lock:
+            cached = WinTweaks._startup_metadata_cache.get(cache_key)
+        if cached and now - cached[0] < STARTUP_METADATA_TTL:
+            return cached[1]
+
+        target = item['path'] if item['source'] == 'StartupFolder' else WinTweaks._resolve_startup_target(item['path'])
+        try:
+            st = os.stat(target)
+            metadata = {'target': target, 'exists': True, 'size': st.st_size, 'mtime': st.st_mtime}
+        except (OSError, ValueError):
+            metadata = {'target': target, 'exists': False, 'size': 0, 'mtime': 0.0}
+        with WinTweaks._startup_metadata_lock:
+            WinTweaks._startup_metadata_cache[cache_key] = (now, metadata)
+        return metadata
+
+    @staticmethod
+    def get_startup_programs() -> List[StartupProgram]:
+        """Gets startup programs from every startup location with their enabled state and target metadata.
+
+        Covers Run (HKCU, HKLM and Wow6432Node), RunOnce and the per-user and
+        common Startup folders. Sources are read concurrently, entries are
+        indexed by ``(scope, source, name)`` so StartupApproved values match in
+        O(1), and resolved target metadata is cached per path and source mtime.
+        """
+        with ThreadPoolExecutor(max_workers=STARTUP_MAX_WORKERS) as pool:
+            source_futures = [pool.submit(WinTweaks._read_startup_registry_source, *source) for source in STARTUP_REGISTRY_SOURCES]
+            source_futures += [pool.submit(WinTweaks._read_startup_folder, scope, folder) for scope, folder in WinTweaks.get_startup_folders()]
+            approved_futures = {
+                (scope, source): pool.submit(WinTweaks._read_startup_approved, hkey, subkey)
+                for scope, hkey in (('user', HKEY_CURRENT_USER), ('machine', HKEY_LOCAL_MACHINE))
+                for source, subkey in STARTUP_APPROVED_SUBKEYS.items()
+            }
+
+            entries = [entry for future in source_futures for entry in future.result()]
+            approved = {key: future.result() for key, future in approved_futures.items()}
+            for item, _ in entries:
+                # Value names are case-insensitive in the registry. Value starting with 0x02 means disabled.
+                value = approved.get((item['scope'], item['source']), {}).get(item['name'].lower())
+                if value and value.startswith(b'\x02'):
+                    item['enabled'] = False
+
+            metadata = pool.map(lambda entry: WinTweaks._startup_metadata(*entry), entries)
+            startup_items = []
+            for (item, _), meta in zip(entries, metadata):
+                item.update(meta)
+                startup_items.append(item)
         return startup_items
 
     @staticmethod
-    def set_startup_program_state(name: str, scope: str, enabled: bool):
+    def set_startup_program_state(name: str, scope: str, enabled: bool, source: str = 'Run'):
         """Enables or disables a startup program."""
-        hkey = winreg.HKEY_CURRENT_USER if scope == 'user' else winreg.HKEY_LOCAL_MACHINE
-        key_path = r"Software\Microsoft\Windows\CurrentVersion\Explorer\StartupApproved\Run"
+        if source not in STARTUP_APPROVED_SUBKEYS:
+            return False, f"'{source}' startup entries cannot be enabled or disabled."
+        hkey = HKEY_CURRENT_USER if scope == 'user' else HKEY_LOCAL_MACHINE
+        key_path = f"{STARTUP_APPROVED_KEY}\\{STARTUP_APPROVED_SUBKEYS[source]}"
         
         try:
-            with winreg.OpenKey(hkey, key_path, 0, winreg.KEY_SET_VALUE) as key:
+            with WinTweaks.registry.OpenKey(hkey, key_path, 0, KEY_SET_VALUE) as key:
                 if enabled:
                     # To enable, delete the value from the 'StartupApproved' key.
-                    winreg.DeleteValue(key, name)
+                    WinTweaks.registry.DeleteValue(key, name)
                 else:
                     # To disable, write a binary value starting with 0x02.
                     disabled_value = b'\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
-                    winreg.SetValueEx(key, name, 0, winreg.REG_BINARY, disabled_value)
+                    WinTweaks.registry.SetValueEx(key, name, 0, REG_BINARY, disabled_value)
+            WinTweaks.registry.flush()
             return True, None
         except FileNotFoundError:
             return False, f"Could not find startup registry key for scope '{scope}'."
@@ -253,102 +1604,145 @@ class WinTweaks:
             return False, f"Error modifying startup state for '{name}': {e}"
 
     @staticmethod
-    def clear_browser_data():
-        """Clears cache, cookies, and history for major browsers."""
-        app_data = os.getenv('LOCALAPPDATA', '')
-        browsers = {
-            'Google Chrome': os.path.join(app_data, 'Google', 'Chrome', 'User Data'),
-            'Microsoft Edge': os.path.join(app_data, 'Microsoft', 'Edge', 'User Data'),
-            'Mozilla Firefox': os.path.join(os.getenv('APPDATA', ''), 'Mozilla', 'Firefox', 'Profiles')
-        }
-        
-        total_deleted_size = 0
-        errors = []
+    def get_browser_profiles() -> List[Tuple[str, str, str, str]]:
+        """Returns ``(browser, kind, profile name, profile path)`` for every installed browser profile.
 
-        data_types_to_clear = [
-            'Cache', 'Code Cache', 'GPUCache', # Chromium
-            'cookies.sqlite', # Firefox
-            'History', 'Cookies' # Chromium (files)
-        ]
+        Only the profiles directory itself is listed; nothing inside a profile
+        is opened here.
+        """
+        profiles = []
+        for browser, kind, env_var, relative in BROWSER_PROFILE_ROOTS:
+            root = os.path.join(os.getenv(env_var, ''), relative)
+            try:
+                with os.scandir(root) as it:
+                    for entry in it:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                        # Every directory under Firefox's Profiles is a profile (e.g. 'abcd1234.default-release').
+                        if kind == 'firefox' or CHROMIUM_PROFILE_RE.match(entry.name):
+                            profiles.append((browser, kind, entry.name, entry.path))
+            except OSError:
+                continue
+        return sorted(profiles)
 
-        for name, path in browsers.items():
-            if os.path.exists(path):
-                for root, dirs, files in os.walk(path):
-                    # Clear directories like 'Cache'
-                    for d in dirs:
-                        if d in data_types_to_clear:
-                            dir_path = os.path.join(root, d)
-                            try:
-                                size = sum(os.path.getsize(os.path.join(dirpath, filename)) for dirpath, _, filenames in os.walk(dir_path) for filename in filenames)
-                                shutil.rmtree(dir_path, ignore_errors=True)
-                                total_deleted_size += size
-                            except Exception as e:
-                                errors.append(f"Failed to delete {dir_path}: {e}")
-                    # Clear files like 'History'
-                    for f in files:
-                        if f in data_types_to_clear:
-                            file_path = os.path.join(root, f)
-                            try:
-                                size = os.path.getsize(file_path)
-                                os.remove(file_path)
-                                total_deleted_size += size
-                            except Exception as e:
-                                errors.append(f"Failed to delete {file_path}: {e}")
+    @staticmethod
+    def _browser_data_paths(kind: str, profile: str, profile_path: str) -> List[Tuple[str, str]]:
+        """Returns ``(category, path)`` for the known data locations of one profile."""
+        paths = [(category, os.path.join(profile_path, relative))
+                 for category, relatives in BROWSER_DATA_PATHS[kind].items() for relative in relatives]
+        if kind == 'firefox':
+            env_var, relative = FIREFOX_CACHE_ROOT
+            paths.append(('Cache', os.path.join(os.getenv(env_var, ''), relative, profile, FIREFOX_CACHE_DIR)))
+        return paths
 
-        cleaned_mb = total_deleted_size / (1024 * 1024)
-        return cleaned_mb, errors
+    @staticmethod
+    def scan_browser_data(cancel_event: Optional[threading.Event] = None) -> List[BrowserDataItem]:
+        """Measures the browser data clear_browser_data would delete, without deleting anything.
+
+        Profiles are found by listing each browser's profiles directory, and
+        only the known cache, cookie and history locations inside them are
+        visited, measured in parallel. Locations that do not exist are left out.
+        """
+        targets = [(browser, profile, category, path)
+                   for browser, kind, profile, profile_path in WinTweaks.get_browser_profiles()
+                   for category, path in WinTweaks._browser_data_paths(kind, profile, profile_path)
+                   if os.path.lexists(path)]
+        items: List[BrowserDataItem] = []
+        with ThreadPoolExecutor(max_workers=CLEANUP_MAX_WORKERS) as pool:
+            futures = {pool.submit(WinTweaks._measure_path, target[3]): target for target in targets}
+            for future, (browser, profile, category, path) in futures.items():
+                if cancel_event and cancel_event.is_set():
+                    future.cancel()
+                    continue
+                size, files = future.result()
+                items.append({'browser': browser, 'profile': profile, 'category': category, 'path': path, 'bytes': size, 'files': files})
+        return items
 
     @staticmethod
-    def _check_windows_update_settings():
-        """Checks if Windows Update is configured for automatic updates."""
-        try:
-            # Check for Windows Update settings in the registry
-            # This key indicates how updates are handled (e.g., 2=Notify, 3=Auto, 4=Download and notify)
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update") as key:
-                au_options = winreg.QueryValueEx(key, "AUOptions")[0]
-                if au_options != 4: # 4 typically means "Download updates automatically and notify when they are ready to be installed"
-                    return {'name': 'Windows Update Not Automatic', 'issue': f'Windows Update is not configured for automatic downloads and notifications (current setting: {au_options}).'}
-        except FileNotFoundError:
-            logging.warning("Windows Update registry key not found. Cannot determine settings.")
-            return {'name': 'Windows Update Check Failed', 'issue': 'Could not determine Windows Update settings (registry key not found).'}
-        except Exception as e:
-            logging.error("Error checking Windows Update settings: %s", e)
-            return {'name': 'Windows Update Check Failed', 'issue': f'Error checking Windows Update settings: {e}'}
-        return None
+    def summarize_browser_data(items: List[BrowserDataItem]) -> Dict[str, Dict[str, int]]:
+        """Returns bytes per browser and category, e.g. ``{'Google Chrome': {'Cache': 123, ...}}``."""
+        summary: Dict[str, Dict[str, int]] = {}
+        for item in items:
+            categories = summary.setdefault(item['browser'], {})
+            categories[item['category']] = categories.get(item['category'], 0) + item['bytes']
+        return summary
 
     @staticmethod
-    def scan_for_vulnerabilities():
-        """Scans for common system vulnerabilities."""
-        vulnerabilities = []
+    def iter_clear_browser_data(items: Optional[List[BrowserDataItem]] = None, cancel_event: Optional[threading.Event] = None) -> Iterator[ProgressEvent]:
+        """Deletes browser data, yielding progress events.
 
-        # 1. Check if User Account Control (UAC) is enabled
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\System") as key:
-                if winreg.QueryValueEx(key, "EnableLUA")[0] != 1:
-                    vulnerabilities.append({'name': 'UAC Disabled', 'issue': 'User Account Control (UAC) is disabled, reducing system security.'})
-        except Exception as e:
-            logging.error("Could not check UAC status: %s", e)
-            vulnerabilities.append({'name': 'UAC Check Failed', 'issue': f'Could not determine UAC status: {e}'})
+        ``items`` is the list from scan_browser_data the user confirmed; if not
+        given, a fresh scan is used. Locations are handed to the background
+        purger, or deleted in place in parallel if they cannot be moved
+        (e.g. while the browser has them open). The last event has kind 'done' and carries
+        ``(cleaned_mb, errors)`` where errors is a CleanupErrors summary.
+        """
+        if items is None:
+            items = WinTweaks.scan_browser_data(cancel_event)
+        errors = CleanupErrors()
+        counter = WorkCounter(sum(item['bytes'] for item in items), sum(item['files'] for item in items))
+        total_deleted_size = 0
+        with ThreadPoolExecutor(max_workers=CLEANUP_MAX_WORKERS) as pool:
+            pending = {pool.submit(WinTweaks._discard_path, item['path'], item['bytes'], item['files'], errors, counter, cancel_event)
+                       for item in items}
+            while pending:
+                done, pending = wait(pending, timeout=PROGRESS_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if not future.cancelled():
+                        total_deleted_size += future.result()
+                if cancel_event and cancel_event.is_set():
+                    for future in pending:
+                        future.cancel()
+                yield counter.event()
 
-        # 2. Check Windows Update settings
-        update_vulnerability = WinTweaks._check_windows_update_settings()
-        if update_vulnerability:
-            vulnerabilities.append(update_vulnerability)
+        done_event = counter.event()
+        done_event.update(kind='done', cancelled=bool(cancel_event and cancel_event.is_set()),
+                          result=(total_deleted_size / (1024 * 1024), errors))
+        yield done_event
 
-        # 3. Check if Windows Firewall is enabled for the standard profile
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\CurrentControlSet\Services\SharedAccess\Parameters\FirewallPolicy\StandardProfile") as key:
-                if winreg.QueryValueEx(key, "EnableFirewall")[0] != 1:
-                    vulnerabilities.append({'name': 'Firewall Disabled', 'issue': 'Windows Firewall is disabled for the standard network profile.'})
-        except Exception as e:
-            logging.error("Could not check Firewall status: %s", e)
-            vulnerabilities.append({'name': 'Firewall Check Failed', 'issue': f'Could not determine Firewall status: {e}'})
+    @staticmethod
+    def clear_browser_data(progress_callback=None):
+        """Clears cache, cookies, and history for major browsers.
 
-        return vulnerabilities
+        Blocking wrapper around iter_clear_browser_data; returns ``(cleaned_mb, errors)``.
+        """
+        return WinTweaks._run_with_callback(WinTweaks.iter_clear_browser_data(), progress_callback)
+
+    @staticmethod
+    def scan_for_vulnerabilities():
+        """Scans for common system vulnerabilities.
+
+        Runs every check registered in securitychecks concurrently and returns
+        ``{'name', 'issue'}`` for each finding, including checks that failed or
+        timed out.
+        """
+        from securitychecks import run_checks  # securitychecks imports this module.
+        return [{'name': result['name'], 'issue': result['issue']} for result in run_checks() if result['status'] != 'ok']
+
+    @staticmethod
+    def get_system_info() -> SystemInfo:
+        """Returns the OS build, CPU model and installed RAM.
+
+        None of these change while the process runs, so they are collected once
+        and cached for the life of the process. The first call can take hundreds
+        of milliseconds (platform shells out for some fields), so make it off the
+        UI thread.
+        """
+        with WinTweaks._system_info_lock:
+            if WinTweaks._system_info_cache is None:
+                import platform
+                import psutil
+                WinTweaks._system_info_cache = {
+                    'os': f"{platform.system()} {platform.release()} ({platform.version()})",
+                    'cpu': platform.processor(),
+                    'ram_total': psutil.virtual_memory().total,
+                }
+            return WinTweaks._system_info_cache
 
     @staticmethod
     def get_local_drives() -> List[str]:
         """Gets a list of local, fixed drives (e.g., ['C:', 'D:'])."""
+        import psutil  # Deferred: only the drive tools need it.
         drives = []
         partitions = psutil.disk_partitions()
         for p in partitions:
@@ -357,18 +1751,215 @@ class WinTweaks:
         return drives
 
     @staticmethod
-    def defragment_drive(drive_letter: str) -> Tuple[bool, str]:
-        """Runs the Windows defragmentation utility on a given drive."""
+    def _disk_usage_index_path(drive_letter: str) -> str:
+        return os.path.join(DISK_USAGE_INDEX_DIR, drive_letter.rstrip(':\\/').replace(os.sep, '_') + ".db")
+
+    @staticmethod
+    def iter_scan_disk_usage(drive_letter: str, cancel_event: Optional[threading.Event] = None) -> Iterator[ProgressEvent]:
+        """Scans a drive into its persistent DirectorySizeIndex, yielding progress events.
+
+        Directories are listed by DISK_USAGE_MAX_WORKERS parallel scandir
+        workers, and a rescan only lists directories whose mtime changed. The
+        index is saved after the scan, even a cancelled one. The last event has
+        kind 'done' and carries the index, for ``children`` and
+        ``largest_files``.
+        """
+        index = DirectorySizeIndex(WinTweaks._disk_usage_index_path(drive_letter)).load()
+        root = drive_letter if drive_letter.endswith(('\\', '/')) else drive_letter + os.sep
+        for event in index.iter_scan(root, DISK_USAGE_MAX_WORKERS, cancel_event):
+            if event['kind'] == 'done':
+                try:
+                    index.save()
+                except (OSError, sqlite3.Error) as e:
+                    logging.warning("Could not save disk usage index for %s: %s", drive_letter, e)
+                logging.info("Disk usage scan of %s %s: %d bytes in %d files.", root,
+                             "cancelled" if event['cancelled'] else "finished", *event['result'])
+                event = dict(event, result=index)
+            yield event
+
+    @staticmethod
+    def scan_disk_usage(drive_letter: str, progress_callback=None) -> DirectorySizeIndex:
+        """Blocking wrapper around iter_scan_disk_usage; returns the drive's index."""
+        return WinTweaks._run_with_callback(WinTweaks.iter_scan_disk_usage(drive_letter), progress_callback)
+
+    @staticmethod
+    def _defrag_command(drive_letter: str) -> List[str]:
+        command = os.getenv(DEFRAG_COMMAND_ENV) or DEFRAG_COMMAND
+        # /U for progress, /V for verbose output
+        return shlex.split(command, posix=os.name != 'nt') + [drive_letter, '/U', '/V']
+
+    @staticmethod
+    def iter_defragment_drive(drive_letter: str, cancel_event: Optional[threading.Event] = None) -> Iterator[ProgressEvent]:
+        """Runs the Windows defragmentation utility on a drive, yielding progress as it prints it.
+
+        Output is read while the process runs (universal newlines turn the
+        carriage-return updates of /U into lines) and every line with a
+        percentage becomes a 'progress' event carrying the pass name as
+        ``stage``. Setting cancel_event terminates the process and anything it
+        started; whatever is still alive DEFRAG_TERMINATE_TIMEOUT seconds later
+        is killed and its remaining output abandoned, so a process that keeps
+        the pipe open cannot hold up the cancel. The last event has kind 'done'
+        and carries ``(success, message)``.
+        """
+        def done(success: bool, message: str, cancelled: bool = False) -> ProgressEvent:
+            return {'kind': 'done', 'drive': drive_letter, 'cancelled': cancelled, 'bytes': 0, 'result': (success, message)}
+
         if not drive_letter or not drive_letter.endswith(':'):
-            return False, "Invalid drive letter format. Expected 'C:'."
-        
+            yield done(False, "Invalid drive letter format. Expected 'C:'.")
+            return
+
+        import subprocess  # Deferred: only defragmentation starts processes.
+        command = WinTweaks._defrag_command(drive_letter)
         try:
-            # /U for progress, /V for verbose output
-            result = subprocess.run(['defrag.exe', drive_letter, '/U', '/V'], capture_output=True, text=True, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            logging.info("Defragmentation output for %s:\n%s", drive_letter, result.stdout)
-            return True, f"Defragmentation for drive {drive_letter} completed successfully."
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                       text=True, errors='replace', bufsize=1, start_new_session=os.name != 'nt',
+                                       creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
         except FileNotFoundError:
-            return False, "defrag.exe not found. This tool may not be available."
-        except subprocess.CalledProcessError as e:
-            logging.error("Defragmentation failed for %s:\n%s", drive_letter, e.stderr)
-            return False, f"Defragmentation failed for drive {drive_letter}. See log for details."
\ No newline at end of file
+            yield done(False, f"{command[0]} not found. This tool may not be available.")
+            return
+        except OSError as e:
+            yield done(False, f"Could not start {command[0]}: {e}")
+            return
+
+        # A reader thread keeps the pipe drained, so this loop can watch cancel_event between lines.
+        lines: "queue.Queue[Optional[str]]" = queue.Queue()
+
+        def read_output():
+            with process.stdout:
+                for line in process.stdout:
+                    lines.put(line.strip())
+            lines.put(None)
+
+        threading.Thread(target=read_output, name=f"defrag-{drive_letter}", daemon=True).start()
+        output: List[str] = []
+        cancelled = False
+        kill_deadline: Optional[float] = None
+        while True:
+            if cancel_event and cancel_event.is_set() and not cancelled:
+                cancelled = True
+                WinTweaks._stop_process_tree(process)
+                kill_deadline = time.monotonic() + DEFRAG_TERMINATE_TIMEOUT
+            elif kill_deadline is not None and time.monotonic() >= kill_deadline:
+                # Still no end of output: kill everything and stop reading. The reader thread
+                # closes the pipe once the last writer is gone; closing it here would block on
+                # the reader's buffer lock.
+                logging.warning("Defragmentation of %s did not stop within %s seconds; killing it.", drive_letter, DEFRAG_TERMINATE_TIMEOUT)
+                WinTweaks._stop_process_tree(process, kill=True)
+                break
+            try:
+                line = lines.get(timeout=PROGRESS_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if line is None:
+                break
+            if not line:
+                continue
+            output.append(line)
+            match = DEFRAG_PROGRESS_RE.match(line)
+            if match:
+                yield {'kind': 'progress', 'drive': drive_letter, 'stage': match.group('stage').strip(),
+                       'progress': min(float(match.group('percent')), 100.0), 'bytes': 0}
+
+        try:
+            returncode = process.wait(timeout=DEFRAG_TERMINATE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            returncode = process.wait()
+
+        if cancelled:
+            logging.info("Defragmentation of %s cancelled. Output:\n%s", drive_letter, "\n".join(output))
+            yield done(False, f"Defragmentation of drive {drive_letter} was cancelled.", cancelled=True)
+        elif returncode == 0:
+            logging.info("Defragmentation output for %s:\n%s", drive_letter, "\n".join(output))
+            yield done(True, f"Defragmentation for drive {drive_letter} completed successfully.")
+        else:
+            logging.error("Defragmentation failed for %s (exit code %s):\n%s", drive_letter, returncode, "\n".join(output))
+            yield done(False, f"Defragmentation failed for drive {drive_letter}. See log for details.")
+
+    @staticmethod
+    def _stop_process_tree(process, kill: bool = False):
+        """Terminates (or kills) a process and every process it started.
+
+        Without psutil only the process itself is stopped on Windows; on POSIX
+        its process group (it was started in a session of its own) is signalled.
+        """
+        try:
+            import psutil  # Deferred: only the drive tools need it.
+        except ImportError:
+            if os.name != 'nt':
+                import signal
+                try:
+                    os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+                    return
+                except OSError:
+                    pass  # Group already gone; fall through for the process itself.
+            try:
+                process.kill() if kill else process.terminate()
+            except OSError:
+                pass
+            return
+        try:
+            children = psutil.Process(process.pid).children(recursive=True)
+        except psutil.Error:
+            children = []
+        for child in children:
+            try:
+                child.kill() if kill else child.terminate()
+            except psutil.Error:
+                pass
+        try:
+            process.kill() if kill else process.terminate()
+        except OSError:
+            pass  # Already gone.
+
+    @staticmethod
+    def defragment_drive(drive_letter: str) -> Tuple[bool, str]:
+        """Runs the Windows defragmentation utility on a given drive.
+
+        Blocking wrapper around iter_defragment_drive; returns ``(success, message)``.
+        """
+        return WinTweaks._run_with_callback(WinTweaks.iter_defragment_drive(drive_letter))
+
+    @staticmethod
+    def iter_defragment_drives(drives: List[str], max_concurrent: int = DEFRAG_MAX_CONCURRENT,
+                               cancel_event: Optional[threading.Event] = None) -> Iterator[ProgressEvent]:
+        """Defragments several drives, at most ``max_concurrent`` at a time, yielding their events.
+
+        Drives start in the given order as slots free up, so an SSD and an HDD
+        can run side by side. Each drive's events are passed through with their
+        kinds renamed to 'drive_progress' and 'drive_done'; unlike 'progress'
+        they are not coalesced by the UI, since they describe different drives.
+        Setting cancel_event terminates the running drives and skips the queued
+        ones. The last event has kind 'done' and carries
+        ``{drive: (success, message)}``.
+        """
+        events: "queue.Queue[ProgressEvent]" = queue.Queue()
+        results: Dict[str, Tuple[bool, str]] = {}
+
+        def run(drive: str):
+            if cancel_event and cancel_event.is_set():
+                events.put({'kind': 'drive_done', 'drive': drive, 'cancelled': True,
+                            'result': (False, f"Defragmentation of drive {drive} was cancelled.")})
+                return
+            for event in WinTweaks.iter_defragment_drive(drive, cancel_event):
+                event['kind'] = 'drive_' + event['kind']
+                events.put(event)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrent)) as pool:
+            pending = {pool.submit(run, drive): drive for drive in drives}
+            while pending or not events.empty():
+                try:
+                    event = events.get(timeout=PROGRESS_POLL_SECONDS)
+                except queue.Empty:
+                    for future in [future for future in pending if future.done()]:
+                        drive = pending.pop(future)
+                        if future.exception() and drive not in results:
+                            logging.error("Defragmentation of %s failed: %s", drive, future.exception())
+                            events.put({'kind': 'drive_done', 'drive': drive, 'cancelled': False,
+                                        'result': (False, f"Defragmentation failed for drive {drive}: {future.exception()}")})
+                    continue
+                if event['kind'] == 'drive_done':
+                    results[event['drive']] = event['result']
+                yield event
+
+        yield {'kind': 'done', 'cancelled': bool(cancel_event and cancel_event.is_set()), 'result': results}